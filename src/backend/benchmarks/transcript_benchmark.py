@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Benchmark da extração de nomes do onboarding por voz.
+
+Mede, sobre o corpus rotulado, a precisão (nome idêntico ao esperado) e a
+vazão da extração, para que as duas sejam acompanhadas juntas ao alterar
+as frases de apresentação.
+
+Uso (a partir de src/backend):
+    python -m benchmarks.transcript_benchmark [--corpus arquivo.jsonl] [--repeat N] [--verbose]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.transcript import extract_name
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "transcript_corpus.jsonl")
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+
+def measure_accuracy(corpus, verbose=False):
+    """Fração dos exemplos extraídos corretamente e confiança média."""
+    correct = 0
+    confidence = 0.0
+    for example in corpus:
+        result = extract_name(example["transcript"])
+        confidence += result.confidence
+        if result.name == example["name"]:
+            correct += 1
+        elif verbose:
+            print(f"  ✗ {example['transcript']!r}: {result.name!r} (esperado {example['name']!r})")
+    return correct / len(corpus), confidence / len(corpus)
+
+
+def measure_throughput(corpus, repeat):
+    """Transcrições processadas por segundo."""
+    transcripts = [example["transcript"] for example in corpus]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for transcript in transcripts:
+            extract_name(transcript)
+    elapsed = time.perf_counter() - start
+    return len(transcripts) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da extração de nomes")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Arquivo JSONL com transcript e name")
+    parser.add_argument("--repeat", type=int, default=2000, help="Repetições do corpus na medição de vazão")
+    parser.add_argument("--verbose", action="store_true", help="Lista os exemplos extraídos incorretamente")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    accuracy, confidence = measure_accuracy(corpus, args.verbose)
+    throughput = measure_throughput(corpus, args.repeat)
+
+    print(f"Exemplos:          {len(corpus)}")
+    print(f"Precisão:          {accuracy:.1%}")
+    print(f"Confiança média:   {confidence:.2f}")
+    print(f"Vazão:             {throughput:,.0f} transcrições/s")
+
+
+if __name__ == "__main__":
+    main()
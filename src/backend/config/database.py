@@ -1,47 +1,171 @@
+"""
+Gerenciamento da conexão com o MongoDB.
+
+Cada worker mantém um único cliente Motor (e portanto um único pool de
+conexões), iniciado no `lifespan` da aplicação e compartilhado por todas as
+rotas através da dependência `get_database`.
+"""
 import os
 import asyncio
-from typing import Optional
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
 
-# Configurações da conexão MongoDB
-MONGODB_URL = os.getenv("MONGODB_URL")
-if not MONGODB_URL:
-    raise ValueError("MONGODB_URL não está configurada no arquivo .env")
 
-DB_NAME = os.getenv("MONGODB_DB_NAME", "papo_comtxae")
+def resolve_database_name() -> str:
+    """Determina o banco de dados baseado no ambiente (NODE_ENV)."""
+    node_env = os.getenv("NODE_ENV", "development")
+    if node_env == "production":
+        return os.getenv("DATABASE_NAME", "papo_comtxae")
+    if node_env == "test":
+        return os.getenv("TEST_DATABASE_NAME", "papo_comtxae_test")
+    return os.getenv("DEV_DATABASE_NAME", "papo_comtxae_dev")
+
+
+@dataclass
+class MongoSettings:
+    """Configurações do cliente e do pool de conexões MongoDB."""
+
+    url: str
+    database_name: str
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: int = 60000
+    server_selection_timeout_ms: int = 5000
+    connect_timeout_ms: int = 10000
+    compressors: List[str] = field(default_factory=lambda: ["zstd", "snappy", "zlib"])
+    use_mock: bool = False
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        """Lê as configurações das variáveis de ambiente."""
+        url = os.getenv("MONGODB_URL")
+        if not url:
+            raise ValueError("MONGODB_URL não está configurada no arquivo .env")
+        return cls(
+            url=url,
+            database_name=resolve_database_name(),
+            max_pool_size=int(os.getenv("MONGODB_MAX_POOL_SIZE", "100")),
+            min_pool_size=int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+            max_idle_time_ms=int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000")),
+            server_selection_timeout_ms=int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+            connect_timeout_ms=int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000")),
+            compressors=[
+                compressor.strip()
+                for compressor in os.getenv("MONGODB_COMPRESSORS", "zstd,snappy,zlib").split(",")
+                if compressor.strip()
+            ],
+            use_mock=os.getenv("USE_MOCK_MONGODB", "0") == "1",
+        )
+
+    def client_options(self) -> Dict[str, Any]:
+        """Opções repassadas ao AsyncIOMotorClient."""
+        return {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "compressors": _available_compressors(self.compressors),
+        }
+
+
+# Módulo Python exigido por cada compressor suportado pelo PyMongo
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def _available_compressors(compressors: List[str]) -> List[str]:
+    """Remove compressores cujas bibliotecas não estão instaladas."""
+    return [
+        compressor for compressor in compressors
+        if compressor in _COMPRESSOR_MODULES
+        and importlib.util.find_spec(_COMPRESSOR_MODULES[compressor]) is not None
+    ]
+
+
+class MongoConnectionManager:
+    """Mantém o cliente MongoDB compartilhado pelo worker."""
+
+    def __init__(self):
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.settings: Optional[MongoSettings] = None
 
-# Cliente MongoDB
-client: Optional[AsyncIOMotorClient] = None
+    @property
+    def is_connected(self) -> bool:
+        return self.client is not None
 
-async def connect_to_mongo():
+    async def connect(self, settings: Optional[MongoSettings] = None) -> AsyncIOMotorDatabase:
+        """Cria o cliente e verifica a conexão com um ping."""
+        if self.client is not None:
+            return self.database
+
+        settings = settings or MongoSettings.from_env()
+        if settings.use_mock:
+            from mongomock_motor import AsyncMongoMockClient
+
+            client = AsyncMongoMockClient()
+        else:
+            client = AsyncIOMotorClient(settings.url, **settings.client_options())
+            try:
+                await client.admin.command("ping")
+            except Exception:
+                client.close()
+                raise
+
+        self.client = client
+        self.settings = settings
+        return self.database
+
+    async def close(self):
+        """Fecha o cliente e o pool de conexões."""
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    @property
+    def database(self) -> AsyncIOMotorDatabase:
+        if self.client is None:
+            raise RuntimeError("MongoDB não está conectado")
+        return self.client[self.settings.database_name]
+
+
+# Conexão compartilhada pelo worker
+mongo = MongoConnectionManager()
+
+
+async def connect_to_mongo(settings: Optional[MongoSettings] = None) -> bool:
     """Conectar ao MongoDB."""
-    global client
     try:
-        client = AsyncIOMotorClient(MONGODB_URL)
-        # Ping para verificar se a conexão está funcionando
-        await client.admin.command('ping')
-        print(f"✅ Conectado ao MongoDB em {MONGODB_URL}")
+        await mongo.connect(settings)
+        print(f"✅ Conectado ao MongoDB (banco {mongo.settings.database_name})")
         return True
     except Exception as e:
         print(f"❌ Erro ao conectar ao MongoDB: {e}")
         return False
 
+
 async def close_mongo_connection():
     """Fechar conexão com MongoDB."""
-    global client
-    if client:
-        client.close()
+    if mongo.is_connected:
+        await mongo.close()
         print("Conexão com MongoDB encerrada.")
 
+
 async def get_database() -> AsyncIOMotorDatabase:
-    """Get database instance."""
-    if not client:
-        await connect_to_mongo()
-    return client[DB_NAME]
+    """Dependência FastAPI que retorna o banco de dados do pool compartilhado."""
+    if not mongo.is_connected:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Conexão com o banco de dados não está disponível"
+        )
+    return mongo.database
+
 
 async def get_collection(collection_name: str):
     """Get collection from database."""
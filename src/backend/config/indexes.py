@@ -0,0 +1,135 @@
+"""
+Registro dos índices MongoDB usados pelas consultas da API.
+
+Os índices são declarados por coleção e aplicados na inicialização da
+aplicação (`ensure_indexes`). `create_indexes` é idempotente: índices que já
+existem com a mesma especificação não são recriados.
+"""
+import logging
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger("papo_social_api")
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        # Verificação de telefone (login). Esparso porque usuários criados por
+        # voz ainda não têm telefone; por isso o campo é omitido, não nulo
+        # (documentos antigos com `phone: null` são corrigidos em `ensure_indexes`).
+        IndexModel([("phone", ASCENDING)], name="phone_unique", unique=True, sparse=True),
+        IndexModel([("associations", ASCENDING)], name="associations"),
+        IndexModel([("communities", ASCENDING)], name="communities"),
+        # Atualização incremental das estatísticas (services/stats.py)
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+        IndexModel([("last_active", ASCENDING)], name="last_active"),
+    ],
+    "requests": [
+        # Filtros do quadro de solicitações; `_id` por último atende a
+        # paginação por cursor sem ordenação em memória
+        IndexModel([("status", ASCENDING), ("_id", ASCENDING)], name="status_id"),
+        IndexModel(
+            [("status", ASCENDING), ("category", ASCENDING), ("_id", ASCENDING)],
+            name="status_category_id",
+        ),
+        IndexModel(
+            [("status", ASCENDING), ("priority", ASCENDING), ("_id", ASCENDING)],
+            name="status_priority_id",
+        ),
+        IndexModel([("category", ASCENDING), ("_id", ASCENDING)], name="category_id"),
+        IndexModel([("created_by", ASCENDING), ("_id", ASCENDING)], name="created_by_id"),
+        IndexModel(
+            [("assigned_to", ASCENDING), ("status", ASCENDING), ("_id", ASCENDING)],
+            name="assigned_to_status_id",
+        ),
+        # Atualização incremental das estatísticas (services/stats.py)
+        IndexModel([("created_at", ASCENDING)], name="created_at"),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "request_comments": [
+        # Bucket ainda aberto da solicitação (upsert de `add_comment`)
+        IndexModel([("request_id", ASCENDING), ("count", ASCENDING)], name="request_id_count"),
+        # Leitura paginada, buckets mais recentes primeiro
+        IndexModel([("request_id", ASCENDING), ("last_id", DESCENDING)], name="request_id_last_id"),
+    ],
+    "residents": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("phone", ASCENDING)], name="phone"),
+    ],
+}
+
+
+async def unset_null_phones(db: AsyncIOMotorDatabase) -> int:
+    """
+    Remove o campo `phone` de usuários que o têm com valor nulo.
+
+    O índice esparso ignora apenas documentos sem o campo; versões antigas
+    gravavam `phone: null` nos usuários criados por voz, e dois desses
+    documentos impedem a criação do índice único. (Um índice parcial com
+    `$type: "string"` evitaria a migração, mas não é suportado pelo
+    mongomock usado nos testes.)
+    """
+    result = await db["users"].update_many(
+        {"phone": {"$in": [None], "$exists": True}}, {"$unset": {"phone": ""}}
+    )
+    if result.modified_count:
+        logger.info(f"Telefone nulo removido de {result.modified_count} usuários")
+    return result.modified_count
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """
+    Cria os índices declarados em `INDEXES`.
+
+    Antes, corrige os dados legados que impediriam o índice único de
+    telefone (`unset_null_phones`). Falhas (ex.: dados duplicados que impedem
+    um índice único) são registradas no log sem impedir a inicialização da
+    aplicação.
+    """
+    try:
+        await unset_null_phones(db)
+    except PyMongoError as e:
+        logger.error(f"Erro ao remover telefones nulos: {e}")
+    created: Dict[str, List[str]] = {}
+    for collection_name, indexes in INDEXES.items():
+        try:
+            created[collection_name] = await db[collection_name].create_indexes(indexes)
+        except (OperationFailure, PyMongoError) as e:
+            logger.error(f"Erro ao criar índices da coleção {collection_name}: {e}")
+    return created
+
+
+async def _index_usage(collection) -> Dict[str, int]:
+    """Número de usos de cada índice desde o início do servidor ($indexStats)."""
+    try:
+        stats = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+    except (PyMongoError, NotImplementedError) as e:
+        logger.warning(f"$indexStats indisponível para {collection.name}: {e}")
+        return {}
+    return {stat["name"]: stat["accesses"]["ops"] for stat in stats}
+
+
+async def index_report(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+    """
+    Compara os índices existentes com o registro.
+
+    Para cada coleção retorna os índices declarados que não existem
+    (`missing`), os existentes que não estão declarados (`undeclared`) e os
+    que nunca foram usados desde o início do servidor (`unused`).
+    """
+    report: Dict[str, Dict[str, Any]] = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        declared = {index.document["name"] for index in indexes}
+        existing = {index["name"] async for index in collection.list_indexes()}
+        existing.discard("_id_")
+        usage = await _index_usage(collection)
+
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared),
+            "unused": sorted(name for name in existing if usage.get(name) == 0),
+        }
+    return report
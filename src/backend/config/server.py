@@ -0,0 +1,139 @@
+"""
+Perfis de execução do servidor uvicorn.
+
+`development` recarrega o código a cada alteração, com um único worker.
+`production` usa um worker por CPU (ou `WEB_CONCURRENCY`), uvloop e
+httptools quando instalados, keep-alive e backlog ajustados e um prazo para
+o encerramento gracioso: ao receber SIGTERM, o uvicorn para de aceitar
+conexões, espera as requisições em andamento por até
+`SERVER_GRACEFUL_TIMEOUT` segundos e só então executa o encerramento do
+lifespan (que grava as filas pendentes).
+
+Cada worker é um processo separado que executa o próprio lifespan: o
+cliente MongoDB e seu pool (`MONGODB_MAX_POOL_SIZE`, por worker) são
+criados depois do fork, nunca compartilhados entre processos.
+"""
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("papo_social_api")
+
+PROFILES = ("development", "production")
+
+
+def default_workers() -> int:
+    """Um worker por CPU disponível para o processo."""
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:  # Plataformas sem sched_getaffinity (macOS, Windows)
+        return os.cpu_count() or 1
+
+
+def _fast_implementation(name: str, module: str, fallback: str) -> str:
+    """Usa a implementação nativa se o pacote estiver instalado."""
+    if importlib.util.find_spec(module) is not None:
+        return name
+    logger.warning(f"{module} não está instalado; usando {fallback}")
+    return fallback
+
+
+@dataclass
+class ServerSettings:
+    """Opções do uvicorn para um perfil de execução."""
+
+    profile: str = "development"
+    host: str = "127.0.0.1"
+    port: int = 8000
+    workers: int = 1
+    reload: bool = True
+    loop: str = "auto"
+    http: str = "auto"
+    log_level: str = "info"
+    access_log: bool = True
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    timeout_graceful_shutdown: Optional[int] = None
+    limit_concurrency: Optional[int] = None
+    # Reinicia o worker após N requisições (contém vazamentos de memória)
+    limit_max_requests: Optional[int] = None
+    proxy_headers: bool = False
+    forwarded_allow_ips: Optional[str] = None
+
+    @classmethod
+    def for_profile(cls, profile: str, host: Optional[str] = None, port: Optional[int] = None) -> "ServerSettings":
+        """Lê as configurações do perfil, com ajustes pelas variáveis de ambiente."""
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil de servidor desconhecido: {profile}")
+        host = host or os.getenv("SERVER_HOST") or ("0.0.0.0" if profile == "production" else "127.0.0.1")
+        port = port or int(os.getenv("SERVER_PORT", "8000"))
+        if profile == "development":
+            return cls(profile=profile, host=host, port=port, log_level=os.getenv("SERVER_LOG_LEVEL", "info"))
+
+        limit_concurrency = os.getenv("SERVER_LIMIT_CONCURRENCY")
+        limit_max_requests = os.getenv("SERVER_LIMIT_MAX_REQUESTS")
+        return cls(
+            profile=profile,
+            host=host,
+            port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY") or default_workers()),
+            reload=False,
+            loop=_fast_implementation("uvloop", "uvloop", "asyncio"),
+            http=_fast_implementation("httptools", "httptools", "h11"),
+            log_level=os.getenv("SERVER_LOG_LEVEL", "info"),
+            # O log de acesso por requisição custa caro sob carga; o proxy já registra
+            access_log=os.getenv("SERVER_ACCESS_LOG", "0") == "1",
+            backlog=int(os.getenv("SERVER_BACKLOG", "2048")),
+            # Maior que o tempo ocioso do proxy (ex.: 60s no ALB/nginx), para
+            # que o proxy feche as conexões ociosas antes do uvicorn
+            timeout_keep_alive=int(os.getenv("SERVER_KEEP_ALIVE", "65")),
+            timeout_graceful_shutdown=int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30")),
+            limit_concurrency=int(limit_concurrency) if limit_concurrency else None,
+            limit_max_requests=int(limit_max_requests) if limit_max_requests else None,
+            proxy_headers=True,
+            forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        )
+
+    def uvicorn_options(self) -> Dict[str, Any]:
+        """Argumentos de `uvicorn.run` (exceto a aplicação)."""
+        options = {
+            "host": self.host,
+            "port": self.port,
+            "reload": self.reload,
+            "loop": self.loop,
+            "http": self.http,
+            "log_level": self.log_level,
+            "access_log": self.access_log,
+            "backlog": self.backlog,
+            "timeout_keep_alive": self.timeout_keep_alive,
+            "proxy_headers": self.proxy_headers,
+        }
+        # Com reload o uvicorn ignora `workers`
+        if not self.reload:
+            options["workers"] = self.workers
+        optional = {
+            "timeout_graceful_shutdown": self.timeout_graceful_shutdown,
+            "limit_concurrency": self.limit_concurrency,
+            "limit_max_requests": self.limit_max_requests,
+            "forwarded_allow_ips": self.forwarded_allow_ips,
+        }
+        options.update((key, value) for key, value in optional.items() if value is not None)
+        return options
+
+
+def serve(settings: ServerSettings, app: str = "main:app"):
+    """Inicia o uvicorn com as opções do perfil."""
+    import uvicorn
+
+    if settings.workers > 1 and not (os.getenv("CACHE_BACKEND_URL") or "").startswith(("redis://", "rediss://")):
+        # Cada worker tem seu cache e seus rankings; sem Redis, as invalidações
+        # e atualizações de ranking não chegam aos demais workers
+        logger.warning(
+            f"{settings.workers} workers sem CACHE_BACKEND_URL Redis: caches e rankings não serão compartilhados"
+        )
+    logger.info(
+        f"Servidor {settings.profile}: {settings.workers} worker(s), loop {settings.loop}, http {settings.http}"
+    )
+    uvicorn.run(app, **settings.uvicorn_options())
@@ -2,28 +2,44 @@
 import os
 import sys
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Body, Depends, status, Query
+from fastapi import FastAPI, HTTPException, Body, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from typing import List, Optional, Any, Dict, Union
-import uvicorn
+from typing import List, Any, Dict
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
-from pymongo.errors import ConnectionFailure, PyMongoError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
 
 # Adicionar o diretório atual ao PATH para encontrar os módulos
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-from config.database import connect_to_mongo, close_mongo_connection, get_database as _get_database
-from models.resident import ResidentModel
-from models.request import RequestModel
-from models.user import UserModel, UserRole, UserAchievement, UserLevel
+from config.database import MongoSettings, get_database, mongo, resolve_database_name
+from config.indexes import ensure_indexes
+from config.server import ServerSettings, serve
+from models.user import UserModel, UserXPResponse, XPAwardBatch
+from services.achievements import evaluate_achievements
+from services.activity import activity_tracker
+from services.audio_metrics import audio_metrics, ensure_audio_metrics_collection
+from services.cache import close_shared_cache, init_shared_cache, invalidate_user, user_cache
+from services.leaderboard import LEADERBOARD_PROJECTION, leaderboards
+from services.level_curve import LevelCurve, init_level_curve, get_level_curve
+from services.realtime import realtime_hub
+from services.stats import stats_refresher
+from services.transcript import extract_name
+from utils.mongo import insert_document, serialize_document
+from utils.responses import MongoJSONResponse, trusted_response
 
 # Importar rotas modulares
 from routes.user_routes import router as user_router
+from routes.request_routes import router as request_router
+from routes.resident_routes import router as resident_router
+from routes.leaderboard_routes import router as leaderboard_router
+from routes.stats_routes import router as stats_router
+from routes.realtime_routes import router as realtime_router
 
 # Carrega as variáveis de ambiente
 load_dotenv()
@@ -46,34 +62,43 @@ if not MONGODB_URL:
 
 # Determina o banco de dados baseado no ambiente
 NODE_ENV = os.getenv("NODE_ENV", "development")
-if NODE_ENV == "production":
-    DATABASE_NAME = os.getenv("DATABASE_NAME", "papo_comtxae")
-elif NODE_ENV == "test":
-    DATABASE_NAME = os.getenv("TEST_DATABASE_NAME", "papo_comtxae_test")
-else:
-    DATABASE_NAME = os.getenv("DEV_DATABASE_NAME", "papo_comtxae_dev")
+DATABASE_NAME = resolve_database_name()
 
 logger.info(f"Usando banco de dados: {DATABASE_NAME} em ambiente: {NODE_ENV}")
 
-# MongoDB client
-mongodb_client: Optional[AsyncIOMotorClient] = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Gerenciador de contexto para início e término da aplicação.
-    Inicializa e fecha conexão com MongoDB.
+    Inicializa e fecha a conexão compartilhada com MongoDB.
     """
     # Código executado na inicialização
-    global mongodb_client
-    logger.info(f"Iniciando conexão com MongoDB: {MONGODB_URL[:20]}...")
     
-    mongodb_client = AsyncIOMotorClient(MONGODB_URL)
+    # Pré-calcula os limiares de XP da curva de níveis
+    level_curve = init_level_curve()
+    logger.info(f"Curva de níveis calculada até o nível {level_curve.max_level}")
+    
+    settings = MongoSettings.from_env()
+    logger.info(
+        f"Iniciando conexão com MongoDB: {MONGODB_URL[:20]}... "
+        f"(pool {settings.min_pool_size}-{settings.max_pool_size})"
+    )
     try:
-        # Verificar conexão
-        await mongodb_client.admin.command("ping")
+        db = await mongo.connect(settings)
         logger.info("Conexão com MongoDB estabelecida com sucesso!")
-    except ConnectionFailure as e:
+        await ensure_indexes(db)
+        shared_backend = await init_shared_cache()
+        ranked_users = await leaderboards.rebuild(db)
+        await leaderboards.attach(shared_backend)
+        logger.info(f"Rankings carregados com {ranked_users} usuários")
+        ttl_days = os.getenv("AUDIO_METRICS_TTL_DAYS")
+        await ensure_audio_metrics_collection(db, int(ttl_days) if ttl_days else None)
+        await audio_metrics.start(db)
+        await activity_tracker.start(db)
+        await stats_refresher.start(db)
+        # O mongomock não tem change streams; nesse caso o observador consulta periodicamente
+        await realtime_hub.start(db, use_change_stream=not settings.use_mock)
+    except (ConnectionFailure, PyMongoError) as e:
         logger.error(f"Falha ao conectar ao MongoDB: {e}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -83,17 +108,24 @@ async def lifespan(app: FastAPI):
     yield  # Aqui a aplicação executa
     
     # Código executado no encerramento
-    if mongodb_client:
-        logger.info("Fechando conexão com MongoDB...")
-        mongodb_client.close()
-        logger.info("Conexão fechada")
+    # Grava as métricas de áudio e os acessos pendentes antes de fechar a conexão
+    await realtime_hub.stop()
+    await stats_refresher.stop()
+    await audio_metrics.stop()
+    await activity_tracker.stop()
+    await leaderboards.attach(None)
+    await close_shared_cache()
+    logger.info("Fechando conexão com MongoDB...")
+    await mongo.close()
+    logger.info("Conexão fechada")
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Papo Social API",
     description="API para gestão de associação de moradores",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=MongoJSONResponse
 )
 
 # Add CORS middleware
@@ -105,20 +137,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dependency to get database instance
-async def get_database():
-    if mongodb_client is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Conexão com o banco de dados não está disponível"
-        )
-    return mongodb_client[DATABASE_NAME]
-
 # Rota de teste/healthcheck
 @app.get("/")
 async def root():
     return {"status": "online", "message": "Papo Social API está funcionando!"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Estatísticas do cache de perfis deste worker"""
+    return {"users": user_cache.stats()}
+
 # Special routes for voice onboarding
 @app.post("/onboarding/voice", response_model=UserModel)
 async def create_user_from_voice(
@@ -139,146 +167,248 @@ async def create_user_from_voice(
             detail="A transcrição não pode estar vazia"
         )
     
-    # Extrai um nome da transcrição - simplificado para este exemplo
-    # Em produção, usaríamos NLP mais avançado
-    name_words = []
-    
-    # Algumas frases-chave que as pessoas podem usar ao se apresentar
-    intro_phrases = [
-        "meu nome é", "me chamo", "sou", 
-        "me chame de", "pode me chamar de"
-    ]
-    
-    lower_transcript = transcript.lower()
-    
-    # Procura por frases de introdução
-    for phrase in intro_phrases:
-        if phrase in lower_transcript:
-            # Pega o texto após a frase de introdução
-            potential_name = lower_transcript.split(phrase, 1)[1].strip()
-            # Pega apenas as primeiras palavras (até 3)
-            name_words = potential_name.split()[:3]
-            break
-    
-    # Se não encontrou nenhuma frase de introdução, usa as primeiras palavras
-    if not name_words and len(transcript.split()) > 0:
-        name_words = transcript.split()[:2]  # Assume que as primeiras palavras são o nome
-    
-    # Formata o nome encontrado
-    extracted_name = " ".join(name_words).strip()
-    
-    # Se ainda não temos um nome, usa um valor padrão
-    if len(extracted_name) < 2:
-        extracted_name = "Novo Usuário"
+    extraction = extract_name(transcript)
+    if extraction.pattern is None:
+        logger.debug("Nenhuma frase de apresentação na transcrição; usando as primeiras palavras")
     
     # Cria um objeto de usuário
     new_user = UserModel(
-        name=extracted_name.title(),  # Capitaliza o nome
-        display_name=extracted_name.title(),
+        name=extraction.name,
+        display_name=extraction.name,
         voice_interactions_count=1
     )
     
-    # Insere no banco de dados
-    users_collection = db["users"]
-    user_data = new_user.model_dump(exclude={"id"})
-    result = await users_collection.insert_one(user_data)
+    # Campos vazios são omitidos (o índice único de telefone é esparso)
+    user_data = new_user.model_dump(exclude={"id"}, exclude_none=True)
     
-    # Recupera o usuário criado
-    created_user = await users_collection.find_one({"_id": result.inserted_id})
-    created_user["id"] = str(created_user.pop("_id"))
+    # Conquistas iniciais (ex.: "Voz Ativa!") são gravadas junto com o usuário
+    user_data["achievements"].extend(
+        evaluate_achievements(user_data, awarded_at=user_data["created_at"])
+    )
     
-    # Concede a conquista de boas-vindas
-    welcome_achievement = {
-        "id": "voice_onboarding",
-        "name": "Voz Ativa!",
-        "description": "Você se apresentou usando sua voz. Bem-vindo ao Papo Social!",
-        "unlocked_at": created_user["created_at"],
-        "icon": "🎤"
-    }
+    # Insere no banco de dados
+    users_collection = db["users"]
+    created_user = await insert_document(users_collection, user_data)
+    await invalidate_user(created_user["id"])
+    await leaderboards.record([created_user])
     
-    await users_collection.update_one(
-        {"_id": ObjectId(created_user["id"])},
-        {"$push": {"achievements": welcome_achievement}}
-    )
+    # Métricas de áudio são gravadas em segundo plano, fora do tempo de resposta
+    metrics = voice_data.get("audio_metrics")
+    if isinstance(metrics, dict) and metrics:
+        await audio_metrics.submit(ObjectId(created_user["id"]), metrics, source="onboarding")
+    return trusted_response(UserModel, created_user)
+
+@app.post("/users/{user_id}/voice-interactions", status_code=status.HTTP_202_ACCEPTED)
+async def record_voice_interaction(
+    user_id: str,
+    voice_data: dict = Body(default={}),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Registra uma interação por voz do usuário.
     
-    if "achievements" not in created_user:
-        created_user["achievements"] = []
-    created_user["achievements"].append(welcome_achievement)
+    As métricas de áudio (se enviadas) e o incremento de
+    `voice_interactions_count` são gravados em lote; a resposta não espera a
+    gravação.
+    """
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=400, detail=f"ID de usuário inválido: {user_id}")
+    object_id = ObjectId(user_id)
+    if not await db["users"].count_documents({"_id": object_id}, limit=1):
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
-    return created_user
+    audio_metrics.record_interaction(object_id)
+    accepted = True
+    metrics = voice_data.get("audio_metrics")
+    if isinstance(metrics, dict) and metrics:
+        accepted = await audio_metrics.submit(object_id, metrics, source="interaction")
+    activity_tracker.touch(object_id)
+    return {"accepted": accepted}
+
+@app.get("/voice/ingestion/stats")
+async def voice_ingestion_stats():
+    """Estado da fila de métricas de áudio deste worker"""
+    return audio_metrics.stats()
 
-@app.put("/users/{user_id}/xp", response_model=UserModel)
+@app.get("/activity/stats")
+async def activity_stats():
+    """Estado do registro de atividade (acessos ainda não gravados) deste worker"""
+    return activity_tracker.stats()
+
+def _level_progress(level_curve: LevelCurve, total_xp: int) -> Dict[str, int]:
+    """Progresso dentro do nível atual, no formato de `UserLevel`."""
+    level, xp, next_level_xp = level_curve.progress(total_xp)
+    return {"level": level, "xp": xp, "next_level_xp": next_level_xp}
+
+def _xp_award_pipeline(xp_amount: int) -> List[Dict[str, Any]]:
+    """
+    Pipeline de atualização que soma o XP e recalcula o nível no MongoDB.
+
+    O XP é acumulado em `xp` e o nível é o número de limiares da curva de
+    níveis já alcançados.
+    Documentos antigos guardavam `level` como objeto (nível + XP dentro do
+    nível); nesse caso o total é reconstruído a partir dos limiares.
+    """
+    thresholds = get_level_curve().thresholds
+    legacy_total_xp = {"$add": [
+        {"$cond": [
+            {"$gt": ["$level.level", 1]},
+            {"$arrayElemAt": [thresholds, {"$subtract": ["$level.level", 2]}]},
+            0
+        ]},
+        {"$ifNull": ["$level.xp", 0]}
+    ]}
+    current_total_xp = {"$cond": [
+        {"$gt": ["$level.level", None]},
+        legacy_total_xp,
+        {"$ifNull": ["$xp", 0]}
+    ]}
+    return [
+        {"$set": {"xp": {"$add": [current_total_xp, xp_amount]}}},
+        {"$set": {
+            "level": {"$add": [1, {"$size": {"$filter": {
+                "input": thresholds,
+                "cond": {"$lte": ["$$this", "$xp"]}
+            }}}]},
+            "updated_at": datetime.now()
+        }}
+    ]
+
+@app.put("/users/{user_id}/xp", response_model=UserXPResponse)
 async def add_user_xp(
     user_id: str,
     xp_data: dict = Body(...),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Adiciona XP ao usuário e atualiza seu nível"""
+    """Adiciona XP ao usuário e atualiza seu nível em uma única operação atômica"""
     users_collection = db["users"]
     
     try:
         xp_amount = int(xp_data.get("xp", 0))
-        if xp_amount <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="A quantidade de XP deve ser um número positivo"
-            )
-        
-        object_id = ObjectId(user_id)
-        user = await users_collection.find_one({"_id": object_id})
-        
-        if not user:
-            raise HTTPException(status_code=404, detail=f"Usuário {user_id} não encontrado")
-        
-        # Extrai os dados de nível atuais
-        current_level = user.get("level", {}).get("level", 1)
-        current_xp = user.get("level", {}).get("xp", 0)
-        next_level_xp = user.get("level", {}).get("next_level_xp", 100)
-        
-        # Calcula o novo XP e verifica se houve level up
-        new_xp = current_xp + xp_amount
-        level_up = False
-        
-        # Fórmula simples de level up: cada nível precisa de 10% mais XP que o anterior
-        while new_xp >= next_level_xp:
-            current_level += 1
-            new_xp -= next_level_xp
-            next_level_xp = int(next_level_xp * 1.1)  # 10% a mais para o próximo nível
-            level_up = True
-        
-        # Atualiza os dados do usuário
-        await users_collection.update_one(
-            {"_id": object_id},
-            {"$set": {
-                "level.level": current_level,
-                "level.xp": new_xp,
-                "level.next_level_xp": next_level_xp
-            }}
+    except (TypeError, ValueError):
+        xp_amount = 0
+    if xp_amount <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A quantidade de XP deve ser um número positivo"
         )
-        
-        # Busca o usuário atualizado
-        updated_user = await users_collection.find_one({"_id": object_id})
-        updated_user["id"] = str(updated_user.pop("_id"))
-        
-        return updated_user
-        
-    except Exception as e:
+    
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ID de usuário inválido: {user_id}"
+        )
+    
+    try:
+        # Soma o XP e recalcula o nível no servidor, devolvendo o documento atualizado
+        updated_user = await users_collection.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            _xp_award_pipeline(xp_amount),
+            return_document=ReturnDocument.AFTER
+        )
+    except PyMongoError as e:
         logger.error(f"Erro ao adicionar XP: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao adicionar XP: {str(e)}"
         )
+    
+    if not updated_user:
+        raise HTTPException(status_code=404, detail=f"Usuário {user_id} não encontrado")
+    await invalidate_user(user_id)
+    await leaderboards.record([updated_user])
+    
+    previous_level = get_level_curve().level_for(updated_user["xp"] - xp_amount)
+    if updated_user["level"] > previous_level:
+        logger.info(f"Usuário {user_id} subiu para o nível {updated_user['level']}")
+    
+    updated_user["level_progress"] = _level_progress(get_level_curve(), updated_user["xp"])
+    return trusted_response(UserXPResponse, serialize_document(updated_user))
+
+@app.post("/users/xp/batch")
+async def add_users_xp_batch(
+    batch: XPAwardBatch,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Concede XP a vários usuários de uma vez (ex.: ao final de um evento).
+
+    Usa o mesmo pipeline de `add_user_xp`, aplicado em um único `bulk_write`
+    não ordenado. Concessões repetidas para o mesmo usuário são somadas.
+    Retorna o resultado por usuário, indicando quem subiu de nível.
+    """
+    users_collection = db["users"]
+    level_curve = get_level_curve()
+    
+    totals: Dict[str, int] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    for award in batch.awards:
+        if not ObjectId.is_valid(award.user_id):
+            results[award.user_id] = {"user_id": award.user_id, "status": "invalid_id"}
+            continue
+        totals[award.user_id] = totals.get(award.user_id, 0) + award.xp
+    
+    if totals:
+        user_ids = list(totals)
+        operations = [
+            UpdateOne({"_id": ObjectId(user_id)}, _xp_award_pipeline(totals[user_id]))
+            for user_id in user_ids
+        ]
+        try:
+            await users_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            logger.error(f"Erro ao adicionar XP em lote: {e.details.get('writeErrors')}")
+            for error in e.details.get("writeErrors", []):
+                user_id = user_ids[error["index"]]
+                results[user_id] = {"user_id": user_id, "status": "error"}
+        except PyMongoError as e:
+            logger.error(f"Erro ao adicionar XP em lote: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao adicionar XP: {str(e)}"
+            )
+        finally:
+            # Mesmo com falhas parciais, parte dos usuários pode ter sido alterada
+            await invalidate_user(*user_ids)
+        
+        updated_users = users_collection.find(
+            {"_id": {"$in": [ObjectId(user_id) for user_id in user_ids if user_id not in results]}},
+            LEADERBOARD_PROJECTION
+        )
+        ranked_users = []
+        async for user in updated_users:
+            ranked_users.append(user)
+            user_id = str(user["_id"])
+            previous_level = level_curve.level_for(user["xp"] - totals[user_id])
+            results[user_id] = {
+                "user_id": user_id,
+                "status": "ok",
+                "xp_awarded": totals[user_id],
+                "xp": user["xp"],
+                "level": user["level"],
+                "previous_level": previous_level,
+                "level_up": user["level"] > previous_level,
+                "level_progress": _level_progress(level_curve, user["xp"])
+            }
+        
+        await leaderboards.record(ranked_users)
+        
+        for user_id in user_ids:
+            results.setdefault(user_id, {"user_id": user_id, "status": "not_found"})
+    
+    return MongoJSONResponse({
+        "updated": sum(1 for result in results.values() if result["status"] == "ok"),
+        "results": list(results.values())
+    })
 
 # Adiciona os routers para diferente funcionalidades
 app.include_router(user_router, prefix="/api")
+app.include_router(leaderboard_router, prefix="/api", tags=["leaderboards"])
+app.include_router(stats_router, prefix="/api", tags=["stats"])
+app.include_router(realtime_router, prefix="/api", tags=["realtime"])
+app.include_router(request_router, tags=["requests"])
+app.include_router(resident_router, tags=["residents"])
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="debug",
-        http="h11",
-        workers=1
-    )
+    # Perfil pela variável SERVER_PROFILE (development ou production); ver config/server.py
+    serve(ServerSettings.for_profile(os.getenv("SERVER_PROFILE", "development")))
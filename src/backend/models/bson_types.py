@@ -15,13 +15,10 @@ class PydanticObjectId(ObjectId):
         """Define como validar e serializar ObjectIds."""
         return core_schema.json_or_python_schema(
             json_schema=core_schema.str_schema(),
-            python_schema=core_schema.union_schema([
-                core_schema.is_instance_schema(ObjectId),
-                core_schema.str_schema(),
-            ]),
-            serialization=core_schema.plain_serializer_function_ser_schema(  # Corrigido: nome correto do método
-                lambda x: str(x) if isinstance(x, ObjectId) else x
-            ),
+            python_schema=core_schema.no_info_plain_validator_function(cls.validate),
+            # Conversão para string feita pelo pydantic-core, sem chamar Python.
+            # Em model_dump() o ObjectId é mantido, pronto para o MongoDB.
+            serialization=core_schema.to_string_ser_schema(when_used="json"),
         )
     
     @classmethod
@@ -29,7 +26,7 @@ class PydanticObjectId(ObjectId):
         """Converte uma string em ObjectId."""
         if isinstance(value, ObjectId):
             return value
-        if isinstance(value, str):
+        if isinstance(value, str) and ObjectId.is_valid(value):
             return ObjectId(value)
         raise ValueError("Invalid ObjectId")
 
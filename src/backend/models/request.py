@@ -1,8 +1,13 @@
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field, field_validator
 from .bson_types import PydanticObjectId
 
+REQUEST_STATUSES = ["pending", "in_progress", "resolved", "cancelled"]
+REQUEST_PRIORITIES = ["low", "medium", "high", "urgent"]
+# Status em que a solicitação ainda aguarda atendimento
+OPEN_REQUEST_STATUSES = ["pending", "in_progress"]
+
 class RequestModel(BaseModel):
     """Modelo para solicitações/chamados de moradores"""
     
@@ -17,22 +22,23 @@ class RequestModel(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: Optional[datetime] = None
     resolved_at: Optional[datetime] = None
-    comments: List[Dict[str, Any]] = []
+    # Os comentários ficam na coleção `request_comments` (ver
+    # services/comments.py); a solicitação guarda só o total e o último
+    comments_count: int = 0
+    last_comment: Optional[Dict[str, Any]] = None
     
     @field_validator("status")
     @classmethod
     def validate_status(cls, v: str) -> str:
-        valid_statuses = ["pending", "in_progress", "resolved", "cancelled"]
-        if v not in valid_statuses:
-            raise ValueError(f"Status must be one of: {', '.join(valid_statuses)}")
+        if v not in REQUEST_STATUSES:
+            raise ValueError(f"Status must be one of: {', '.join(REQUEST_STATUSES)}")
         return v
     
     @field_validator("priority")
     @classmethod
     def validate_priority(cls, v: str) -> str:
-        valid_priorities = ["low", "medium", "high", "urgent"]
-        if v not in valid_priorities:
-            raise ValueError(f"Priority must be one of: {', '.join(valid_priorities)}")
+        if v not in REQUEST_PRIORITIES:
+            raise ValueError(f"Priority must be one of: {', '.join(REQUEST_PRIORITIES)}")
         return v
     
     model_config = {
@@ -47,3 +53,24 @@ class RequestModel(BaseModel):
             }
         }
     }
+
+
+class RequestStatusUpdate(BaseModel):
+    """Alteração de status (e, opcionalmente, do responsável) de uma solicitação"""
+    
+    status: str
+    assigned_to: Optional[PydanticObjectId] = None
+    
+    @field_validator("status")
+    @classmethod
+    def validate_status(cls, v: str) -> str:
+        if v not in REQUEST_STATUSES:
+            raise ValueError(f"Status must be one of: {', '.join(REQUEST_STATUSES)}")
+        return v
+
+
+class CommentCreate(BaseModel):
+    """Novo comentário em uma solicitação"""
+    
+    author_id: PydanticObjectId
+    text: str = Field(..., min_length=1, max_length=2000)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator, EmailStr
+from pydantic import AliasChoices, BaseModel, Field, field_validator, EmailStr
 from enum import Enum
 
 class UserRole(str, Enum):
@@ -15,7 +15,12 @@ class UserAchievement(BaseModel):
     id: str
     name: str
     description: str
-    awarded_at: datetime = Field(default_factory=datetime.now)
+    # Documentos antigos gravavam a data como `unlocked_at`
+    awarded_at: datetime = Field(
+        default_factory=datetime.now,
+        validation_alias=AliasChoices("awarded_at", "unlocked_at"),
+    )
+    icon: Optional[str] = None
 
 class UserLevel(BaseModel):
     level: int = 1
@@ -29,6 +34,31 @@ class UserLevel(BaseModel):
             return 1
         return v
 
+class XPAward(BaseModel):
+    """Concessão de XP para um usuário."""
+    user_id: str
+    xp: int = Field(..., gt=0, description="Quantidade de XP a conceder")
+
+class XPAwardBatch(BaseModel):
+    """Lote de concessões de XP (ex.: participantes de um evento)."""
+    awards: List[XPAward] = Field(..., min_length=1, max_length=1000)
+
+class UserSummary(BaseModel):
+    """Visão resumida do usuário (nome e progresso)."""
+    id: Optional[str] = None
+    name: str
+    display_name: Optional[str] = None
+    level: int = 1
+    xp: int = 0
+
+class UserListItem(UserSummary):
+    """Campos exibidos na listagem de usuários."""
+    phone: Optional[str] = None
+    profile_image: Optional[str] = None
+    role: UserRole = UserRole.RESIDENT
+    is_active: bool = True
+    created_at: Optional[datetime] = None
+
 class UserModel(BaseModel):
     """Modelo para representar um usuário no sistema."""
     
@@ -102,4 +132,9 @@ class UserModel(BaseModel):
                 "is_active": True
             }
         }
-    } 
\ No newline at end of file
+    }
+
+
+class UserXPResponse(UserModel):
+    """Usuário após receber XP, com o progresso dentro do nível atual."""
+    level_progress: UserLevel = Field(default_factory=UserLevel)
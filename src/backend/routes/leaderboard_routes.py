@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from services.leaderboard import (
+    GLOBAL_SCOPE,
+    association_scope,
+    community_scope,
+    leaderboards,
+)
+
+router = APIRouter()
+
+SCOPES = {"associations": association_scope, "communities": community_scope}
+
+
+def _scope(kind: str, scope_id: str) -> str:
+    if kind not in SCOPES:
+        raise HTTPException(status_code=404, detail=f"Unknown leaderboard: {kind}")
+    return SCOPES[kind](scope_id)
+
+
+def _rank(scope: str, user_id: str):
+    rank = leaderboards.rank(scope, user_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="User not found in this leaderboard")
+    return rank
+
+
+@router.get("/leaderboards/global")
+async def global_leaderboard(
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Top users by XP"""
+    return leaderboards.top(GLOBAL_SCOPE, limit, offset)
+
+
+@router.get("/leaderboards/global/rank/{user_id}")
+async def global_rank(user_id: str):
+    """A user's position in the global leaderboard"""
+    return _rank(GLOBAL_SCOPE, user_id)
+
+
+@router.get("/leaderboards/{kind}/{scope_id}")
+async def scoped_leaderboard(
+    kind: str,
+    scope_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Top users by XP within an association or community"""
+    return leaderboards.top(_scope(kind, scope_id), limit, offset)
+
+
+@router.get("/leaderboards/{kind}/{scope_id}/rank/{user_id}")
+async def scoped_rank(kind: str, scope_id: str, user_id: str):
+    """A user's position within an association or community leaderboard"""
+    return _rank(_scope(kind, scope_id), user_id)
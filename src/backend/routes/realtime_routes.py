@@ -0,0 +1,93 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config.database import get_database
+from services.realtime import (
+    Subscription,
+    format_sse,
+    realtime_hub,
+    request_topic,
+    user_topic,
+    watched_projection,
+)
+
+router = APIRouter()
+
+MAX_TOPICS = 50
+# Periodic SSE comment: keeps proxies from closing idle streams and detects gone clients
+HEARTBEAT_SECONDS = 15.0
+
+
+def _object_ids(values: Optional[List[str]], label: str) -> List[ObjectId]:
+    ids = []
+    for value in values or []:
+        if not ObjectId.is_valid(value):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid {label} ID: {value}"
+            )
+        ids.append(ObjectId(value))
+    return ids
+
+
+async def event_stream(subscription: Subscription, heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[bytes]:
+    """Yield the subscription's events as SSE; unsubscribes when the client leaves."""
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        realtime_hub.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def events(
+    user_id: Optional[List[str]] = Query(None),
+    request_id: Optional[List[str]] = Query(None),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Server-Sent Events stream with profile (`user`) and request (`request`) updates.
+
+    Subscribe with one or more `user_id` / `request_id` query parameters. The
+    current state of each subscribed document is sent first; `user` events
+    carry `level_up: true` when the level increased.
+    """
+    user_ids = _object_ids(user_id, "user")
+    request_ids = _object_ids(request_id, "request")
+    topics = [user_topic(i) for i in user_ids] + [request_topic(i) for i in request_ids]
+    if not topics:
+        raise HTTPException(status_code=400, detail="Subscribe to at least one user_id or request_id")
+    if len(topics) > MAX_TOPICS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TOPICS} subscriptions per connection")
+
+    subscription = realtime_hub.subscribe(topics)
+    try:
+        for collection, ids in (("users", user_ids), ("requests", request_ids)):
+            if ids:
+                async for document in db[collection].find({"_id": {"$in": ids}}, watched_projection(collection)):
+                    realtime_hub.send_current(subscription, collection, document)
+    except BaseException:
+        realtime_hub.unsubscribe(subscription)
+        raise
+
+    return StreamingResponse(
+        event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/events/stats")
+async def events_stats():
+    """Change watcher and connection counts for this worker"""
+    return realtime_hub.stats()
@@ -0,0 +1,225 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from config.database import get_database
+from models.request import (
+    OPEN_REQUEST_STATUSES,
+    REQUEST_PRIORITIES,
+    REQUEST_STATUSES,
+    CommentCreate,
+    RequestModel,
+    RequestStatusUpdate,
+)
+from services.comments import add_comment, list_comments
+from utils.export import EXPORT_FORMAT_PATTERN, export_response
+from utils.mongo import insert_document, serialize_document
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page, parse_cursor
+from utils.responses import MongoJSONResponse
+
+router = APIRouter()
+
+# Fields returned by the request list view (the board does not need the
+# full description)
+REQUEST_LIST_PROJECTION = {
+    "title": 1,
+    "status": 1,
+    "category": 1,
+    "priority": 1,
+    "created_by": 1,
+    "assigned_to": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "comments_count": 1,
+    "last_comment": 1,
+}
+
+
+def _object_id(value: str, name: str) -> ObjectId:
+    if not ObjectId.is_valid(value):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {name}: {value}"
+        )
+    return ObjectId(value)
+
+
+def _request_filter(
+    status_filter: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    created_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build the MongoDB filter from the query string parameters"""
+    query: Dict[str, Any] = {}
+    if status_filter:
+        query["status"] = status_filter
+    if category:
+        query["category"] = category
+    if priority:
+        query["priority"] = priority
+    if assigned_to:
+        query["assigned_to"] = _object_id(assigned_to, "assigned_to")
+    if created_by:
+        query["created_by"] = _object_id(created_by, "created_by")
+    return query
+
+
+@router.post("/requests/", status_code=status.HTTP_201_CREATED)
+async def create_request(
+    request: RequestModel,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Create a new resident request"""
+    now = datetime.now()
+    request_data = request.model_dump(
+        exclude={"id", "updated_at", "resolved_at"}, exclude_none=True
+    )
+    request_data.update(status="pending", created_at=now, updated_at=now, comments_count=0)
+
+    created_request = await insert_document(db["requests"], request_data)
+    return MongoJSONResponse(created_request, status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/requests/")
+async def list_requests(
+    status_filter: Optional[str] = Query(None, alias="status", pattern=f"^({'|'.join(REQUEST_STATUSES)})$"),
+    category: Optional[str] = None,
+    priority: Optional[str] = Query(None, pattern=f"^({'|'.join(REQUEST_PRIORITIES)})$"),
+    assigned_to: Optional[str] = None,
+    created_by: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor (last seen request ID)"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    List requests, newest first, using keyset pagination.
+
+    Filters map onto the compound indexes declared in config/indexes.py.
+    """
+    query = _request_filter(status_filter, category, priority, assigned_to, created_by)
+    return MongoJSONResponse(await fetch_page(
+        db["requests"],
+        query,
+        projection=REQUEST_LIST_PROJECTION,
+        after=parse_cursor(after),
+        limit=limit,
+        descending=True,
+    ))
+
+
+@router.get("/requests/stats")
+async def request_stats(
+    category: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    created_by: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Request counts by status, category and priority for the board dashboard"""
+    query = _request_filter(category=category, assigned_to=assigned_to, created_by=created_by)
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "open": [
+                {"$match": {"status": {"$in": OPEN_REQUEST_STATUSES}}},
+                {"$count": "count"},
+            ],
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_category": [{"$group": {"_id": "$category", "count": {"$sum": 1}}}],
+            "by_priority": [{"$group": {"_id": "$priority", "count": {"$sum": 1}}}],
+        }},
+    ]
+    facets = (await db["requests"].aggregate(pipeline).to_list(1))[0]
+
+    def counts(name):
+        return {group["_id"]: group["count"] for group in facets[name]}
+
+    return {
+        "total": facets["total"][0]["count"] if facets["total"] else 0,
+        "open": facets["open"][0]["count"] if facets["open"] else 0,
+        "by_status": {request_status: 0 for request_status in REQUEST_STATUSES} | counts("by_status"),
+        "by_category": counts("by_category"),
+        "by_priority": {priority: 0 for priority in REQUEST_PRIORITIES} | counts("by_priority"),
+    }
+
+
+@router.get("/requests/export")
+async def export_requests(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    status_filter: Optional[str] = Query(None, alias="status", pattern=f"^({'|'.join(REQUEST_STATUSES)})$"),
+    category: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Export requests as NDJSON, CSV or Parquet"""
+    query = _request_filter(status_filter, category)
+    return export_response(db["requests"], query, RequestModel, format, "requests")
+
+
+@router.get("/requests/{request_id}")
+async def get_request(
+    request_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get a request by ID"""
+    request = await db["requests"].find_one({"_id": _object_id(request_id, "request ID")})
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return MongoJSONResponse(serialize_document(request))
+
+
+@router.patch("/requests/{request_id}/status")
+async def update_request_status(
+    request_id: str,
+    update: RequestStatusUpdate,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Update the status (and optionally the assignee) of a request"""
+    now = datetime.now()
+    changes: Dict[str, Any] = {"status": update.status, "updated_at": now}
+    if update.assigned_to is not None:
+        changes["assigned_to"] = update.assigned_to
+    if update.status == "resolved":
+        changes["resolved_at"] = now
+
+    request = await db["requests"].find_one_and_update(
+        {"_id": _object_id(request_id, "request ID")},
+        {"$set": changes},
+        return_document=ReturnDocument.AFTER
+    )
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return MongoJSONResponse(serialize_document(request))
+
+
+@router.post("/requests/{request_id}/comments", status_code=status.HTTP_201_CREATED)
+async def create_comment(
+    request_id: str,
+    comment: CommentCreate,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Add a comment to a request"""
+    created = await add_comment(
+        db, _object_id(request_id, "request ID"), comment.author_id, comment.text
+    )
+    if created is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return MongoJSONResponse(created, status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/requests/{request_id}/comments")
+async def get_comments(
+    request_id: str,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor (last seen comment ID)"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """List the comments of a request, newest first"""
+    return MongoJSONResponse(await list_comments(
+        db, _object_id(request_id, "request ID"), after=parse_cursor(after), limit=limit
+    ))
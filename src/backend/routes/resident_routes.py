@@ -0,0 +1,121 @@
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from config.database import get_database
+from models.resident import ResidentModel
+from services.resident_import import import_residents
+from utils.export import EXPORT_FORMAT_PATTERN, export_response
+from utils.ingest import iter_csv_rows, iter_lines, iter_ndjson_rows
+from utils.mongo import insert_document, serialize_document
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page, parse_cursor
+from utils.responses import MongoJSONResponse
+
+router = APIRouter()
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@router.get("/residents/")
+async def list_residents(
+    response: Response,
+    is_active: Optional[bool] = None,
+    role: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor (last seen resident ID)"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    List residents using keyset pagination.
+
+    The cursor for the next page is returned in the `X-Next-Cursor` header.
+    """
+    query = {}
+    if is_active is not None:
+        query["is_active"] = is_active
+    if role:
+        query["role"] = role
+
+    page = await fetch_page(db["residents"], query, after=parse_cursor(after), limit=limit)
+    headers = {"X-Next-Cursor": page["next_cursor"]} if page["next_cursor"] else None
+    return MongoJSONResponse(page["items"], headers=headers)
+
+
+@router.post("/residents/", status_code=status.HTTP_201_CREATED)
+async def create_resident(
+    resident: ResidentModel,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Register a new resident"""
+    try:
+        created = await insert_document(
+            db["residents"], resident.model_dump(exclude={"id"}, exclude_none=True)
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A resident with this email already exists"
+        )
+    return MongoJSONResponse(created, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/residents/import")
+async def import_residents_upload(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the Content-Type"),
+    delimiter: str = Query(",", min_length=1, max_length=1),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Bulk import residents from a CSV (with header) or NDJSON request body.
+
+    The body is parsed and written in batches while it is being received.
+    Residents are matched by email, so re-importing a sheet updates them.
+    Rows that fail validation are reported with their row number.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    upload_format = format or IMPORT_FORMATS.get(content_type)
+    if upload_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson"
+        )
+
+    lines = iter_lines(request.stream())
+    if upload_format == "csv":
+        rows = iter_csv_rows(lines, delimiter=delimiter)
+    else:
+        rows = iter_ndjson_rows(lines)
+    return MongoJSONResponse(await import_residents(db, rows))
+
+
+@router.get("/residents/export")
+async def export_residents(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    is_active: Optional[bool] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Export residents as NDJSON, CSV or Parquet"""
+    query = {} if is_active is None else {"is_active": is_active}
+    return export_response(db["residents"], query, ResidentModel, format, "residents")
+
+
+@router.get("/residents/{resident_id}")
+async def get_resident(
+    resident_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get a resident by ID"""
+    if not ObjectId.is_valid(resident_id):
+        raise HTTPException(status_code=400, detail=f"Invalid resident ID: {resident_id}")
+    resident = await db["residents"].find_one({"_id": ObjectId(resident_id)})
+    if not resident:
+        raise HTTPException(status_code=404, detail="Resident not found")
+    return MongoJSONResponse(serialize_document(resident))
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config.database import get_database
+from services.leaderboard import association_scope, community_scope
+from services.stats import get_scope_stats
+from utils.mongo import serialize_document
+
+router = APIRouter()
+
+SCOPES = {"associations": association_scope, "communities": community_scope}
+
+
+@router.get("/stats/{kind}/{scope_id}")
+async def scope_stats(
+    kind: str,
+    scope_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Dashboard statistics of an association or community.
+
+    Served from the materialized `scope_stats` document, refreshed in the
+    background; `refreshed_at` tells how recent the numbers are.
+    """
+    if kind not in SCOPES:
+        raise HTTPException(status_code=404, detail=f"Unknown statistics: {kind}")
+    stats = await get_scope_stats(db, SCOPES[kind](scope_id))
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No statistics for this scope yet")
+    return serialize_document(stats)
@@ -1,15 +1,48 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from datetime import datetime
 
 # Import the database dependency
 from config.database import get_database
+from models.user import UserListItem, UserModel, UserSummary
+from services.achievements import evaluate_achievements
+from services.activity import activity_tracker
+from services.cache import invalidate_user, user_cache
+from services.leaderboard import leaderboards
+from utils.mongo import (
+    insert_document,
+    parse_fields,
+    project_document,
+    projection_for,
+    serialize_document,
+)
+from utils.export import EXPORT_FORMAT_PATTERN, export_response
+from utils.responses import MongoJSONResponse
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    fetch_page,
+    keyset_filter,
+    parse_cursor,
+    stream_ndjson,
+)
 
 router = APIRouter()
 
+# Fields returned by the user list view
+USER_LIST_PROJECTION = projection_for(UserListItem)
+
+# Named read models accepted by the `fields` parameter
+USER_VIEWS = {"summary": UserSummary, "list": UserListItem}
+
+FIELDS_DESCRIPTION = "Comma-separated user fields, or a view name (summary, list)"
+
 # MongoDB-based models
 class UserCreate(BaseModel):
     name: str
@@ -27,18 +60,16 @@ async def create_user(
     """Create a new user in MongoDB"""
     users_collection = db["users"]
     
-    # Convert model to dictionary for database
-    user_data = user.model_dump()
+    # Convert model to dictionary for database (phone is omitted when empty,
+    # since the unique phone index is sparse)
+    user_data = user.model_dump(exclude_none=True)
     user_data["created_at"] = datetime.now()
     user_data["updated_at"] = datetime.now()
     
-    # Insert into database
-    result = await users_collection.insert_one(user_data)
-    
-    # Get the created user
-    created_user = await users_collection.find_one({"_id": result.inserted_id})
-    created_user["id"] = str(created_user.pop("_id"))
-    
+    # Insert into database and build the response from the inserted document
+    created_user = await insert_document(users_collection, user_data)
+    await invalidate_user(created_user["id"])
+    await leaderboards.record([created_user])
     return created_user
 
 @router.post("/users/verify-phone")
@@ -54,65 +85,143 @@ async def verify_phone(
     
     users_collection = db["users"]
     
-    # Check if user exists with this phone number
-    existing_user = await users_collection.find_one({"phone": verification.phone})
-    
-    if existing_user:
-        # User exists, return the user
-        existing_user["id"] = str(existing_user.pop("_id"))
-        return existing_user
+    # Single atomic upsert: returns the existing user or creates a new one.
+    # The unique phone index guarantees one user per phone number. The _id is
+    # generated here so that ReturnDocument.BEFORE (None on insert) tells a
+    # new user apart without another read.
+    now = datetime.now()
+    new_user = {
+        "_id": ObjectId(),
+        "name": "User",  # Will be updated later
+        "created_at": now,
+        "updated_at": now
+    }
+    # First-time achievements are evaluated in memory and written on insert
+    new_user["achievements"] = evaluate_achievements(
+        {**new_user, "phone": verification.phone}, awarded_at=now
+    )
+    upsert = dict(
+        filter={"phone": verification.phone},
+        update={"$setOnInsert": new_user},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    try:
+        existing = await users_collection.find_one_and_update(**upsert)
+    except DuplicateKeyError:
+        # A concurrent verification inserted the same phone first
+        existing = await users_collection.find_one_and_update(**upsert)
+
+    if existing is not None:
+        user = serialize_document(existing)
     else:
-        # Create new user if phone number not found
-        new_user = {
-            "name": f"User",  # Will be updated later
-            "phone": verification.phone,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        }
-        
-        result = await users_collection.insert_one(new_user)
-        created_user = await users_collection.find_one({"_id": result.inserted_id})
-        created_user["id"] = str(created_user.pop("_id"))
-        
-        return created_user
+        # Only a new user changes cached lookups and the leaderboards
+        user = serialize_document({**new_user, "phone": verification.phone})
+        await invalidate_user(user["id"])
+        await leaderboards.record([user])
+    activity_tracker.touch(user["id"])
+    return user
+
+
+@router.post("/users/{user_id}/activity", status_code=status.HTTP_204_NO_CONTENT)
+async def record_activity(user_id: str):
+    """
+    Record that the user is active (app heartbeat).
+
+    Only kept in memory; `last_active` and `streak_days` are written in
+    periodic batches.
+    """
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid user ID: {user_id}"
+        )
+    activity_tracker.touch(user_id)
+
+@router.get("/users/export")
+async def export_users(
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Export all users (list view fields) as NDJSON, CSV or Parquet"""
+    return export_response(db["users"], {}, UserListItem, format, "users")
+
 
 @router.get("/users/{user_id}")
 async def get_user(
     user_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Get user by ID from MongoDB"""
-    users_collection = db["users"]
+    """
+    Get user by ID, served from the per-worker cache when possible.
+
+    With `fields`, only the requested fields are returned: sliced from the
+    cached profile when present, otherwise read with a MongoDB projection.
+    """
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid user ID: {user_id}"
+        )
+    projection = parse_fields(fields, UserModel, USER_VIEWS)
     
-    try:
-        object_id = ObjectId(user_id)
-        user = await users_collection.find_one({"_id": object_id})
-        
+    if projection is not None:
+        cached = user_cache.peek(user_id)
+        if cached is not None:
+            return MongoJSONResponse(project_document(cached, projection))
+        user = await db["users"].find_one({"_id": ObjectId(user_id)}, projection)
         if not user:
             raise HTTPException(status_code=404, detail=f"User not found")
-        
-        user["id"] = str(user.pop("_id"))
-        return user
-    except Exception as e:
-        if "ObjectId" in str(e):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid user ID: {user_id}"
-            )
+        return MongoJSONResponse(serialize_document(user))
+    
+    async def load_user():
+        user = await db["users"].find_one({"_id": ObjectId(user_id)})
+        return serialize_document(user) if user else None
+    
+    try:
+        user = await user_cache.get_or_load(user_id, load_user)
+    except PyMongoError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving user: {str(e)}"
         )
+    
+    if not user:
+        raise HTTPException(status_code=404, detail=f"User not found")
+    return MongoJSONResponse(user)
 
 @router.get("/users/")
 async def list_users(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor (last seen user ID)"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """List all users from MongoDB"""
+    """
+    List users from MongoDB using keyset pagination.
+
+    The JSON format returns one page and the cursor for the next one. The
+    NDJSON format streams every user after the cursor (up to `limit`, if
+    given) while the Motor cursor reads them.
+    """
     users_collection = db["users"]
-    
-    users = await users_collection.find().to_list(1000)
-    for user in users:
-        user["id"] = str(user.pop("_id"))
-    
-    return users 
\ No newline at end of file
+    cursor_id = parse_cursor(after)
+    projection = parse_fields(fields, UserModel, USER_VIEWS) or USER_LIST_PROJECTION
+
+    if format == "ndjson":
+        cursor = users_collection.find(
+            keyset_filter({}, cursor_id), projection
+        ).sort("_id", 1).limit(limit or 0)
+        return StreamingResponse(
+            stream_ndjson(cursor), media_type="application/x-ndjson"
+        )
+
+    return MongoJSONResponse(await fetch_page(
+        users_collection,
+        {},
+        projection=projection,
+        after=cursor_id,
+        limit=limit or DEFAULT_PAGE_SIZE,
+    ))
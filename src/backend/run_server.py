@@ -6,16 +6,41 @@ Uso: python run_server.py [opções]
 Opções:
   --dev        Inicia em modo de desenvolvimento (padrão)
   --test       Inicia em modo de teste com MongoDB mockado
-  --prod       Inicia em modo de produção
+  --prod       Inicia em modo de produção (um worker por CPU, uvloop, httptools)
   --port PORT  Porta para o servidor (padrão: 8000)
-  --host HOST  Host para o servidor (padrão: 127.0.0.1)
+  --host HOST  Host para o servidor (padrão: 127.0.0.1; 0.0.0.0 em produção)
+  --workers N  Número de workers em produção (padrão: WEB_CONCURRENCY ou nº de CPUs)
+  --check-indexes  Relata índices ausentes, não declarados ou sem uso e sai
 """
 
 import os
 import sys
-import uvicorn
+import asyncio
 import argparse
 
+from config.server import ServerSettings, serve
+
+
+async def check_indexes():
+    """Compara os índices do banco com o registro em config/indexes.py"""
+    from config.database import mongo
+    from config.indexes import index_report
+
+    db = await mongo.connect()
+    try:
+        report = await index_report(db)
+    finally:
+        await mongo.close()
+
+    problems = 0
+    for collection_name, result in report.items():
+        print(f"[{collection_name}]")
+        for status in ("missing", "undeclared", "unused"):
+            names = result[status]
+            problems += len(names) if status == "missing" else 0
+            print(f"  {status}: {', '.join(names) if names else '-'}")
+    return 1 if problems else 0
+
 def main():
     """Função principal para iniciar o servidor"""
     parser = argparse.ArgumentParser(description="Inicia o servidor FastAPI")
@@ -24,11 +49,16 @@ def main():
     parser.add_argument("--dev", action="store_true", help="Modo de desenvolvimento")
     parser.add_argument("--test", action="store_true", help="Modo de teste")
     parser.add_argument("--prod", action="store_true", help="Modo de produção")
-    parser.add_argument("--port", type=int, default=8000, help="Porta do servidor")
-    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host do servidor")
+    parser.add_argument("--port", type=int, default=None, help="Porta do servidor")
+    parser.add_argument("--host", type=str, default=None, help="Host do servidor")
+    parser.add_argument("--workers", type=int, default=None, help="Número de workers (produção)")
+    parser.add_argument("--check-indexes", action="store_true", help="Relata o estado dos índices e sai")
     
     args = parser.parse_args()
     
+    if args.check_indexes:
+        sys.exit(asyncio.run(check_indexes()))
+    
     # Configura o modo
     if args.test:
         # Modo de teste com MongoDB mockado
@@ -46,14 +76,13 @@ def main():
         os.environ["USE_MOCK_MONGODB"] = "0"
         print("Iniciando servidor em modo de desenvolvimento...")
     
-    # Inicia o servidor
-    uvicorn.run(
-        "main:app",
-        host=args.host,
-        port=args.port,
-        reload=not args.prod,  # Auto-reload apenas em dev e test
-        log_level="info"
+    # Inicia o servidor com o perfil do modo (ver config/server.py)
+    settings = ServerSettings.for_profile(
+        "production" if args.prod else "development", host=args.host, port=args.port
     )
+    if args.prod and args.workers:
+        settings.workers = args.workers
+    serve(settings)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
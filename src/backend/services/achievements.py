@@ -0,0 +1,77 @@
+"""
+Regras de conquistas avaliadas em memória.
+
+Cada regra recebe o documento do usuário e decide se a conquista deve ser
+concedida. As regras são avaliadas antes da escrita no banco, de modo que as
+conquistas iniciais são gravadas junto com o próprio documento, sem
+atualizações adicionais.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    """Conquista concedida quando `condition(user)` é verdadeira."""
+
+    id: str
+    name: str
+    description: str
+    icon: str
+    condition: Callable[[Dict[str, Any]], bool]
+
+    def to_achievement(self, awarded_at: datetime) -> Dict[str, Any]:
+        """Conquista no formato de `UserAchievement`."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "awarded_at": awarded_at,
+            "icon": self.icon,
+        }
+
+
+ACHIEVEMENT_RULES: List[AchievementRule] = [
+    AchievementRule(
+        id="voice_onboarding",
+        name="Voz Ativa!",
+        description="Você se apresentou usando sua voz. Bem-vindo ao Papo Social!",
+        icon="🎤",
+        condition=lambda user: user.get("voice_interactions_count", 0) >= 1,
+    ),
+    AchievementRule(
+        id="phone_verified",
+        name="Número Verificado",
+        description="Verificou seu número de telefone com sucesso",
+        icon="📱",
+        condition=lambda user: bool(user.get("phone")),
+    ),
+]
+
+
+def register_achievement_rule(rule: AchievementRule) -> AchievementRule:
+    """Adiciona uma regra de conquista ao registro global."""
+    if any(existing.id == rule.id for existing in ACHIEVEMENT_RULES):
+        raise ValueError(f"Já existe uma regra de conquista com id {rule.id}")
+    ACHIEVEMENT_RULES.append(rule)
+    return rule
+
+
+def evaluate_achievements(
+    user: Dict[str, Any],
+    awarded_at: Optional[datetime] = None,
+    rules: Optional[Iterable[AchievementRule]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Retorna as conquistas que o usuário passa a ter segundo as regras.
+
+    Conquistas que o usuário já possui não são repetidas.
+    """
+    awarded_at = awarded_at or datetime.now()
+    owned = {achievement["id"] for achievement in user.get("achievements", [])}
+    return [
+        rule.to_achievement(awarded_at)
+        for rule in (ACHIEVEMENT_RULES if rules is None else rules)
+        if rule.id not in owned and rule.condition(user)
+    ]
@@ -0,0 +1,149 @@
+"""
+Registro de atividade dos usuários (último acesso e dias consecutivos).
+
+As rotas chamam `touch`, que só guarda em memória o horário mais recente de
+cada usuário. Periodicamente (e no encerramento) os horários acumulados são
+gravados com um único `bulk_write`: cada usuário recebe no máximo uma
+atualização por ciclo, não importa quantas requisições fez.
+
+A sequência (`streak_days`) é calculada na gravação, comparando o dia do
+novo acesso com o `last_active` gravado: mesmo dia mantém a sequência, dia
+seguinte soma 1 e um intervalo maior recomeça em 1.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from services.cache import invalidate_user
+
+logger = logging.getLogger("papo_social_api")
+
+
+def next_streak(streak_days: int, last_active: Optional[datetime], seen_at: datetime) -> int:
+    """Sequência de dias após um acesso em `seen_at`."""
+    if last_active is None:
+        return 1
+    days = (seen_at.date() - last_active.date()).days
+    if days <= 0:
+        return max(streak_days, 1)
+    if days == 1:
+        return streak_days + 1
+    return 1
+
+
+class ActivityTracker:
+    """Acumula os acessos por usuário e os grava em lote."""
+
+    def __init__(self, flush_interval: float = 60.0, max_pending: int = 10000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._pending: Dict[ObjectId, datetime] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.flushes = 0
+        self.updated = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        """Inicia a gravação periódica (chamado no lifespan)."""
+        self.db = db
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Encerra a gravação periódica e grava os acessos pendentes."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.flush()
+
+    def touch(self, user_id: Any, seen_at: Optional[datetime] = None):
+        """Registra um acesso do usuário (sem acessar o banco)."""
+        user_id = ObjectId(user_id) if not isinstance(user_id, ObjectId) else user_id
+        seen_at = seen_at or datetime.now()
+        previous = self._pending.get(user_id)
+        if previous is None or seen_at > previous:
+            self._pending[user_id] = seen_at
+        if len(self._pending) >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Grava os acessos acumulados; retorna o número de usuários atualizados."""
+        # O lock impede que a gravação periódica e a do encerramento se sobreponham
+        async with self._lock:
+            if not self._pending or self.db is None:
+                return 0
+            pending, self._pending = self._pending, {}
+            users = self.db["users"]
+            try:
+                current = {
+                    user["_id"]: user
+                    async for user in users.find(
+                        {"_id": {"$in": list(pending)}}, {"last_active": 1, "streak_days": 1}
+                    )
+                }
+                operations = []
+                for user_id, seen_at in pending.items():
+                    user = current.get(user_id)
+                    if user is None:
+                        continue
+                    streak = user.get("streak_days") or 0
+                    # `$max` nunca recua o último acesso, mesmo se outro
+                    # worker já gravou um horário mais recente
+                    update: Dict[str, Any] = {"$max": {"last_active": seen_at}}
+                    new_streak = next_streak(streak, user.get("last_active"), seen_at)
+                    if new_streak != streak:
+                        update["$set"] = {"streak_days": new_streak}
+                    operations.append(UpdateOne({"_id": user_id}, update))
+                if operations:
+                    await users.bulk_write(operations, ordered=False)
+            except Exception as e:
+                # Devolve os acessos para a próxima tentativa, sem perder os mais recentes
+                for user_id, seen_at in pending.items():
+                    self.touch(user_id, seen_at)
+                logger.error(f"Erro ao gravar atividade de {len(pending)} usuários: {e}")
+                return 0
+
+            self.flushes += 1
+            self.updated += len(operations)
+            await invalidate_user(*(user_id for user_id in pending if user_id in current))
+            return len(operations)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "updated": self.updated,
+        }
+
+
+# Atividade dos usuários deste worker (iniciada no lifespan)
+activity_tracker = ActivityTracker(
+    flush_interval=float(os.getenv("ACTIVITY_FLUSH_SECONDS", "60")),
+    max_pending=int(os.getenv("ACTIVITY_MAX_PENDING", "10000")),
+)
@@ -0,0 +1,209 @@
+"""
+Ingestão assíncrona das métricas de áudio das interações por voz.
+
+As rotas apenas enfileiram as métricas (`submit`) e respondem; uma tarefa em
+segundo plano agrupa os itens da fila e os grava com `insert_many` na
+coleção de série temporal `audio_metrics`. Os incrementos de
+`voice_interactions_count` dos usuários (`record_interaction`) são
+acumulados em memória e gravados no mesmo ciclo, ou a cada
+`flush_interval` sem métricas na fila, um `$inc` por usuário.
+
+A fila é limitada: quando o banco não acompanha o ritmo das interações,
+`submit` espera no máximo `put_timeout` segundos e então descarta a métrica
+(contabilizada em `dropped`), sem atrasar a resposta ao usuário. No
+encerramento (`stop`), tudo o que está na fila e as contagens pendentes
+são gravados.
+"""
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from services.cache import invalidate_user
+
+logger = logging.getLogger("papo_social_api")
+
+AUDIO_METRICS_COLLECTION = "audio_metrics"
+
+_STOP = object()
+
+
+async def ensure_audio_metrics_collection(db: AsyncIOMotorDatabase, expire_after_days: Optional[int] = None):
+    """Cria a coleção de série temporal, se ainda não existir."""
+    options: Dict[str, Any] = {
+        "timeseries": {"timeField": "recorded_at", "metaField": "meta", "granularity": "seconds"},
+    }
+    if expire_after_days:
+        options["expireAfterSeconds"] = expire_after_days * 86400
+    try:
+        await db.create_collection(AUDIO_METRICS_COLLECTION, **options)
+    except CollectionInvalid:
+        pass  # Já existe
+    except (OperationFailure, NotImplementedError) as e:
+        # Servidores anteriores ao MongoDB 5.0 (e o mongomock) não têm séries
+        # temporais; os documentos são gravados em uma coleção comum
+        logger.warning(f"Coleção de série temporal indisponível, usando coleção comum: {e}")
+
+
+class AudioMetricsIngestor:
+    """Fila limitada de métricas de áudio gravadas em lote."""
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        put_timeout: float = 0.05,
+    ):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._interactions: Counter = Counter()
+        self.received = 0
+        self.inserted = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        """Inicia a tarefa de gravação (chamado no lifespan)."""
+        self.db = db
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Grava o que resta na fila e as contagens pendentes e encerra a tarefa."""
+        if self._worker is not None:
+            worker, self._worker = self._worker, None
+            # Sinal de fim: a tarefa grava tudo o que foi enfileirado antes dele
+            await self._queue.put(_STOP)
+            await worker
+        if self._interactions and self.db is not None:
+            # Interações contadas com a tarefa já parada
+            await self._flush([])
+
+    def record_interaction(self, user_id: Any):
+        """Soma 1 ao `voice_interactions_count` do usuário na próxima gravação."""
+        self._interactions[user_id] += 1
+
+    async def submit(
+        self,
+        user_id: Any,
+        metrics: Dict[str, Any],
+        source: str,
+        recorded_at: Optional[datetime] = None,
+        count_interaction: bool = False,
+    ) -> bool:
+        """
+        Enfileira as métricas de uma interação.
+
+        Com `count_interaction`, também chama `record_interaction`, mesmo
+        que a métrica seja descartada.
+        Retorna `False` se a métrica foi descartada (fila cheia ou ingestão
+        parada).
+        """
+        self.received += 1
+        # A contagem de interações não depende da fila: só o documento de
+        # métricas pode ser descartado
+        if count_interaction:
+            self.record_interaction(user_id)
+        if self._worker is None:
+            self.dropped += 1
+            return False
+
+        document = {
+            "recorded_at": recorded_at or datetime.now(),
+            "meta": {"user_id": user_id, "source": source},
+            "metrics": metrics,
+        }
+        try:
+            await asyncio.wait_for(self._queue.put(document), self.put_timeout)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            logger.warning("Fila de métricas de áudio cheia; métrica descartada")
+            return False
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            try:
+                item = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+            except asyncio.TimeoutError:
+                # Sem métricas: grava apenas as contagens de interações
+                if self._interactions:
+                    await self._flush(batch)
+                continue
+            # Junta o que chegar até completar o lote ou vencer o intervalo
+            deadline = loop.time() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                timeout = deadline - loop.time()
+                if len(batch) >= self.batch_size or timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        if batch:
+            try:
+                await self.db[AUDIO_METRICS_COLLECTION].insert_many(batch, ordered=False)
+                self.inserted += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Erro ao gravar {len(batch)} métricas de áudio: {e}")
+
+        if self._interactions:
+            interactions, self._interactions = self._interactions, Counter()
+            try:
+                await self.db["users"].bulk_write(
+                    [
+                        UpdateOne({"_id": user_id}, {"$inc": {"voice_interactions_count": count}})
+                        for user_id, count in interactions.items()
+                    ],
+                    ordered=False,
+                )
+            except Exception as e:
+                logger.error(f"Erro ao atualizar contagem de interações por voz: {e}")
+            finally:
+                await invalidate_user(*interactions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "received": self.received,
+            "inserted": self.inserted,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "pending_interactions": sum(self._interactions.values()),
+        }
+
+
+# Fila das métricas de áudio deste worker (iniciada no lifespan)
+audio_metrics = AudioMetricsIngestor(
+    maxsize=int(os.getenv("AUDIO_METRICS_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("AUDIO_METRICS_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("AUDIO_METRICS_FLUSH_SECONDS", "1.0")),
+)
@@ -0,0 +1,271 @@
+"""
+Cache em dois níveis para leituras frequentes.
+
+`AsyncLRUCache` (L1) fica na memória de cada worker: combina limite de
+tamanho (LRU) com tempo de expiração (TTL) e agrupa leituras concorrentes da
+mesma chave em uma única consulta ao banco (single-flight). Os valores
+armazenados devem ser tratados como somente leitura por quem os recebe.
+
+`TieredCache` adiciona um nível compartilhado entre workers (L2, ver
+`cache_backends`) e publica as invalidações para que todos os workers
+descartem suas cópias locais.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from bson import json_util
+
+from services.cache_backends import SharedCacheBackend, create_cache_backend
+
+logger = logging.getLogger("papo_social_api")
+
+KEY_PREFIX = "papo_social"
+
+
+def _retrieve_exception(task: asyncio.Task):
+    # Evita o aviso de exceção não recuperada quando todos os leitores desistiram
+    if not task.cancelled():
+        task.exception()
+
+
+class AsyncLRUCache:
+    """Cache LRU com TTL, seguro para uso concorrente no event loop."""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor em cache (ou `default`), contando acerto/falha."""
+        found, value = self._lookup(key)
+        if found:
+            self.hits += 1
+            return value
+        self.misses += 1
+        return default
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor em cache (ou `default`) sem contar acerto/falha."""
+        found, value = self._lookup(key)
+        return value if found else default
+
+    def set(self, key: Hashable, value: Any):
+        """Armazena um valor, descartando o menos usado se o cache estiver cheio."""
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Remove a chave, inclusive de uma leitura em andamento."""
+        self._data.pop(key, None)
+        # A leitura em andamento pode ter começado antes da escrita: seu
+        # resultado não deve ser armazenado
+        self._inflight.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+        self._inflight.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Retorna o valor em cache ou o carrega com `loader`.
+
+        Chamadas concorrentes para a mesma chave aguardam a mesma carga, que
+        roda em uma tarefa própria: cancelar uma das chamadas (ex.: cliente
+        desconectado) não cancela a carga nem afeta as demais.
+        Resultados `None` (ex.: documento inexistente) não são armazenados.
+        """
+        found, value = self._lookup(key)
+        if found:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load(key, loader))
+            inflight.add_done_callback(_retrieve_exception)
+            self._inflight[key] = inflight
+        return await asyncio.shield(inflight)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+            # Uma invalidação durante a carga descarta o valor carregado
+            if value is not None and self._inflight.get(key) is task:
+                self.set(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class TieredCache:
+    """
+    Cache L1 (por worker) com um L2 opcional compartilhado entre workers.
+
+    Sem backend configurado, comporta-se como o próprio L1. Uma carga que
+    começou antes de uma invalidação em outro worker pode repovoar o L2 com
+    o valor antigo; o TTL do L2 limita por quanto tempo isso é visível.
+    """
+
+    def __init__(self, namespace: str, local: AsyncLRUCache, ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.local = local
+        self.ttl = ttl if ttl is not None else local.ttl
+        self.backend: Optional[SharedCacheBackend] = None
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    @property
+    def channel(self) -> str:
+        return f"{KEY_PREFIX}:invalidate:{self.namespace}"
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{KEY_PREFIX}:{self.namespace}:{key}"
+
+    async def attach(self, backend: Optional[SharedCacheBackend]):
+        """Conecta o cache ao backend compartilhado e ouve as invalidações."""
+        self.backend = backend
+        if backend is not None:
+            await backend.subscribe(self.channel, self.local.invalidate)
+            # Invalidações perdidas durante uma queda do pub/sub: descarta o L1
+            backend.on_reconnect(self.local.clear)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Busca no L1, depois no L2 e, por fim, com `loader`."""
+        if self.backend is None:
+            return await self.local.get_or_load(key, loader)
+
+        async def load_shared():
+            shared_key = self._shared_key(key)
+            try:
+                raw = await self.backend.get(shared_key)
+            except Exception as e:
+                logger.warning(f"Cache compartilhado indisponível: {e}")
+                return await loader()
+            if raw is not None:
+                self.shared_hits += 1
+                return json_util.loads(raw)
+
+            self.shared_misses += 1
+            value = await loader()
+            if value is not None:
+                try:
+                    await self.backend.set(shared_key, json_util.dumps(value).encode(), self.ttl)
+                except Exception as e:
+                    logger.warning(f"Erro ao gravar no cache compartilhado: {e}")
+            return value
+
+        return await self.local.get_or_load(key, load_shared)
+
+    def peek(self, key: Hashable) -> Any:
+        """Retorna o valor do L1, se houver, sem carregá-lo nem contar nas estatísticas."""
+        return self.local.peek(key)
+
+    async def invalidate(self, *keys: Hashable):
+        """Remove as chaves deste worker, do L2 e dos demais workers."""
+        for key in keys:
+            self.local.invalidate(key)
+        if self.backend is None or not keys:
+            return
+        try:
+            await self.backend.delete(*(self._shared_key(key) for key in keys))
+            for key in keys:
+                await self.backend.publish(self.channel, str(key))
+        except Exception as e:
+            logger.warning(f"Erro ao propagar invalidação de cache: {e}")
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.local.stats()
+        if self.backend is not None:
+            stats["shared_hits"] = self.shared_hits
+            stats["shared_misses"] = self.shared_misses
+        return stats
+
+
+# Cache dos perfis de usuário (GET /api/users/{user_id})
+user_cache = TieredCache(
+    "users",
+    AsyncLRUCache(
+        maxsize=int(os.getenv("USER_CACHE_MAX_SIZE", "10000")),
+        ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "30")),
+    ),
+    ttl=float(os.getenv("SHARED_CACHE_TTL_SECONDS", "300")),
+)
+
+# Caches que usam o backend compartilhado quando ele está configurado
+TIERED_CACHES = [user_cache]
+
+_shared_backend: Optional[SharedCacheBackend] = None
+
+
+async def init_shared_cache(url: Optional[str] = None) -> Optional[SharedCacheBackend]:
+    """Configura o L2 a partir de CACHE_BACKEND_URL (chamado no lifespan)."""
+    global _shared_backend
+    _shared_backend = create_cache_backend(url if url is not None else os.getenv("CACHE_BACKEND_URL"))
+    for cache in TIERED_CACHES:
+        await cache.attach(_shared_backend)
+    return _shared_backend
+
+
+async def close_shared_cache():
+    global _shared_backend
+    if _shared_backend is not None:
+        await _shared_backend.close()
+        _shared_backend = None
+    for cache in TIERED_CACHES:
+        cache.backend = None
+
+
+async def invalidate_user(*user_ids: Optional[Any]):
+    """Remove os perfis dos usuários dos caches após uma escrita."""
+    await user_cache.invalidate(*(str(user_id) for user_id in user_ids if user_id is not None))
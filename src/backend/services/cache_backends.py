@@ -0,0 +1,200 @@
+"""
+Backends do cache compartilhado (L2) entre workers.
+
+O backend guarda valores serializados com TTL e distribui mensagens de
+invalidação (publish/subscribe) para todos os workers. `RedisCacheBackend`
+fala o protocolo Redis; `MemoryCacheBackend` mantém tudo no processo e é
+usado em testes ou quando há um único worker.
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("papo_social_api")
+
+MessageHandler = Callable[[str], None]
+
+# Espera máxima entre tentativas de reconexão do pub/sub (segundos)
+RECONNECT_DELAY_MAX = 30.0
+
+
+class SharedCacheBackend(ABC):
+    """Interface dos backends de cache compartilhado."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        ...
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        """Chama `handler(message)` para cada mensagem publicada no canal."""
+        ...
+
+    def on_reconnect(self, callback: Callable[[], None]):
+        """
+        Registra `callback`, chamado quando a assinatura é refeita após uma
+        queda de conexão (mensagens publicadas nesse intervalo se perderam).
+        """
+
+    async def close(self):
+        pass
+
+
+class MemoryCacheBackend(SharedCacheBackend):
+    """Backend em memória, compartilhado pelos caches do mesmo processo."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+        self._subscribers: Dict[str, List[MessageHandler]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._data[key] = (self._clock() + ttl, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def publish(self, channel: str, message: str):
+        for handler in self._subscribers.get(channel, []):
+            handler(message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        self._subscribers.setdefault(channel, []).append(handler)
+
+    async def close(self):
+        self._data.clear()
+        self._subscribers.clear()
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    """Backend Redis (ou compatível, ex.: KeyDB, Valkey)."""
+
+    def __init__(self, url: str, client: Any = None):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError(
+                    "O backend Redis requer o pacote 'redis' (pip install redis)"
+                )
+            client = redis.from_url(url)
+        self._client = client
+        self._pubsub = None
+        self._handlers: Dict[str, List[MessageHandler]] = {}
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self._client.set(key, value, px=int(ttl * 1000))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*keys)
+
+    async def publish(self, channel: str, message: str):
+        await self._client.publish(channel, message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub()
+        self._handlers.setdefault(channel, []).append(handler)
+        await self._pubsub.subscribe(channel)
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    def on_reconnect(self, callback: Callable[[], None]):
+        self._reconnect_handlers.append(callback)
+
+    async def _listen(self):
+        """Entrega as mensagens e, se a conexão cair, reconecta e refaz as assinaturas."""
+        delay = 0.5
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    delay = 0.5
+                    self._dispatch(message)
+                logger.warning("Conexão pub/sub do cache encerrada; reconectando")
+            except Exception as e:
+                logger.warning(f"Conexão pub/sub do cache perdida ({e}); reconectando em {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+            try:
+                await self._resubscribe()
+            except Exception as e:
+                logger.warning(f"Falha ao reconectar ao pub/sub do cache: {e}")
+                continue
+            logger.info(f"Pub/sub do cache reconectado ({len(self._handlers)} canais)")
+            for callback in self._reconnect_handlers:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Erro ao tratar reconexão do cache: {e}")
+
+    async def _resubscribe(self):
+        previous, self._pubsub = self._pubsub, self._client.pubsub()
+        try:
+            await previous.close()
+        except Exception:
+            pass  # A conexão antiga já está quebrada
+        await self._pubsub.subscribe(*self._handlers)
+
+    def _dispatch(self, message: Dict[str, Any]):
+        if message.get("type") != "message":
+            return
+        channel = message["channel"].decode()
+        data = message["data"].decode()
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(data)
+            except Exception as e:
+                logger.error(f"Erro ao processar invalidação de cache: {e}")
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.close()
+        await self._client.close()
+
+
+def create_cache_backend(url: Optional[str]) -> Optional[SharedCacheBackend]:
+    """Cria o backend a partir da URL (`redis://`, `rediss://` ou `memory://`)."""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemoryCacheBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Backend de cache não suportado: {url}")
@@ -0,0 +1,125 @@
+"""
+Comentários de solicitações armazenados em buckets.
+
+Em vez de crescer um array dentro da solicitação, os comentários são
+gravados na coleção `request_comments` em documentos ("buckets") de até
+`COMMENT_BUCKET_SIZE` comentários cada:
+
+    {request_id, count, first_id, last_id, comments: [{_id, author_id, text, created_at}]}
+
+Um novo comentário entra no bucket ainda não cheio da solicitação (ou cria um
+novo, via upsert) com uma única escrita. A solicitação mantém apenas
+`comments_count` e `last_comment`, de modo que a listagem de solicitações não
+lê os comentários.
+"""
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DESCENDING, ReturnDocument
+
+COMMENTS_COLLECTION = "request_comments"
+COMMENT_BUCKET_SIZE = int(os.getenv("COMMENT_BUCKET_SIZE", "50"))
+
+
+def _serialize_comment(comment: Dict[str, Any]) -> Dict[str, Any]:
+    serialized = dict(comment)
+    serialized["id"] = str(serialized.pop("_id"))
+    return serialized
+
+
+async def add_comment(
+    db: AsyncIOMotorDatabase,
+    request_id: ObjectId,
+    author_id: ObjectId,
+    text: str,
+    created_at: Optional[datetime] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Adiciona um comentário à solicitação.
+
+    Retorna o comentário criado, ou `None` se a solicitação não existe. O
+    total e o último comentário da solicitação são atualizados primeiro; se a
+    gravação no bucket falhar, o contador pode ficar adiantado até a próxima
+    correção, mas nenhum comentário é perdido silenciosamente.
+    """
+    created_at = created_at or datetime.now()
+    comment = {
+        "_id": ObjectId(),
+        "author_id": author_id,
+        "text": text,
+        "created_at": created_at,
+    }
+
+    request = await db["requests"].find_one_and_update(
+        {"_id": request_id},
+        {
+            "$inc": {"comments_count": 1},
+            "$set": {"last_comment": comment, "updated_at": created_at},
+        },
+        projection={"_id": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if request is None:
+        return None
+
+    # Comentários concorrentes podem abrir dois buckets ao mesmo tempo; ambos
+    # são preenchidos normalmente e a leitura não depende de haver só um aberto
+    # nem de os intervalos de ids dos buckets serem disjuntos
+    await db[COMMENTS_COLLECTION].update_one(
+        {"request_id": request_id, "count": {"$lt": COMMENT_BUCKET_SIZE}},
+        {
+            "$push": {"comments": comment},
+            "$inc": {"count": 1},
+            "$min": {"first_id": comment["_id"]},
+            "$max": {"last_id": comment["_id"]},
+        },
+        upsert=True,
+    )
+    return _serialize_comment(comment)
+
+
+async def list_comments(
+    db: AsyncIOMotorDatabase,
+    request_id: ObjectId,
+    after: Optional[ObjectId] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """
+    Página de comentários, mais recentes primeiro.
+
+    `after` é o id do último comentário da página anterior. Só são lidos os
+    buckets necessários para completar a página (mais um comentário, para
+    saber se existe uma próxima).
+    """
+    query: Dict[str, Any] = {"request_id": request_id}
+    if after is not None:
+        query["first_id"] = {"$lt": after}
+
+    # Em ordem decrescente de `last_id`, nenhum bucket seguinte tem comentário
+    # mais novo que o `last_id` do bucket atual: a leitura para assim que a
+    # página está completa com comentários mais novos que ele
+    cursor = db[COMMENTS_COLLECTION].find(
+        query, {"comments": 1, "last_id": 1}
+    ).sort("last_id", DESCENDING)
+    comments: List[Dict[str, Any]] = []
+    async for bucket in cursor:
+        if len(comments) > limit and comments[limit]["_id"] > bucket["last_id"]:
+            break
+        comments.extend(
+            comment for comment in bucket["comments"]
+            if after is None or comment["_id"] < after
+        )
+        comments.sort(key=lambda c: c["_id"], reverse=True)
+
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = str(comments[-1]["_id"])
+
+    return {
+        "items": [_serialize_comment(comment) for comment in comments],
+        "next_cursor": next_cursor,
+    }
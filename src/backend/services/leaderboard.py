@@ -0,0 +1,182 @@
+"""
+Rankings de XP mantidos incrementalmente em memória.
+
+Cada ranking (global, por associação e por comunidade) é um `RankedSet`:
+chaves `(-xp, user_id)` em uma `SortedList` (sortedcontainers), dividida em
+sublistas indexadas. Atualizar o XP de um usuário, obter sua posição e o
+top N custam O(log n) sem consultar o banco.
+
+Os rankings são reconstruídos a partir do MongoDB na inicialização
+(`rebuild`) e atualizados pelas rotas que alteram o XP (`record`). Com o
+cache compartilhado configurado, as atualizações são publicadas para que os
+rankings dos demais workers acompanhem.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import json_util
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from sortedcontainers import SortedList
+
+from services.cache import KEY_PREFIX
+from services.cache_backends import SharedCacheBackend
+
+logger = logging.getLogger("papo_social_api")
+
+GLOBAL_SCOPE = "global"
+# Campos do usuário usados pelos rankings
+LEADERBOARD_PROJECTION = {"name": 1, "display_name": 1, "xp": 1, "level": 1, "associations": 1, "communities": 1}
+
+
+def association_scope(association_id: str) -> str:
+    return f"association:{association_id}"
+
+
+def community_scope(community_id: str) -> str:
+    return f"community:{community_id}"
+
+
+class RankedSet:
+    """Membros ordenados por pontuação (maior primeiro; empate pelo id)."""
+
+    def __init__(self):
+        self._keys: SortedList = SortedList()
+        self._scores: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, member: str) -> bool:
+        return member in self._scores
+
+    def update(self, member: str, score: int):
+        old = self._scores.get(member)
+        if old == score:
+            return
+        if old is not None:
+            self._keys.remove((-old, member))
+        self._scores[member] = score
+        self._keys.add((-score, member))
+
+    def remove(self, member: str):
+        old = self._scores.pop(member, None)
+        if old is not None:
+            self._keys.remove((-old, member))
+
+    def rank(self, member: str) -> Optional[int]:
+        """Posição (a partir de 0) do membro, ou `None` se não está no ranking."""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return self._keys.index((-score, member))
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[str, int]]:
+        keys = self._keys.islice(offset, offset + limit)
+        return [(member, -score) for score, member in keys]
+
+
+class Leaderboards:
+    """Rankings global, por associação e por comunidade deste worker."""
+
+    def __init__(self):
+        self._boards: Dict[str, RankedSet] = {}
+        # Dados exibidos no ranking e escopos em que cada usuário aparece
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self.backend: Optional[SharedCacheBackend] = None
+
+    @property
+    def channel(self) -> str:
+        return f"{KEY_PREFIX}:leaderboard"
+
+    @staticmethod
+    def _scopes(user: Dict[str, Any]) -> List[str]:
+        return (
+            [GLOBAL_SCOPE]
+            + [association_scope(a) for a in user.get("associations") or []]
+            + [community_scope(c) for c in user.get("communities") or []]
+        )
+
+    def _apply(self, user: Dict[str, Any]):
+        user_id = str(user.get("_id", user.get("id")))
+        scopes = self._scopes(user)
+        previous = self._profiles.get(user_id)
+        if previous is not None:
+            for scope in set(previous["scopes"]) - set(scopes):
+                self._boards[scope].remove(user_id)
+                if not self._boards[scope]:
+                    del self._boards[scope]
+
+        xp = user.get("xp") or 0
+        self._profiles[user_id] = {
+            "name": user.get("display_name") or user.get("name"),
+            "level": user.get("level") or 1,
+            "xp": xp,
+            "scopes": scopes,
+        }
+        for scope in scopes:
+            self._boards.setdefault(scope, RankedSet()).update(user_id, xp)
+
+    def clear(self):
+        self._boards.clear()
+        self._profiles.clear()
+
+    async def rebuild(self, db: AsyncIOMotorDatabase) -> int:
+        """Recarrega todos os rankings a partir da coleção de usuários."""
+        self.clear()
+        async for user in db["users"].find({}, LEADERBOARD_PROJECTION, batch_size=5000):
+            self._apply(user)
+        return len(self._profiles)
+
+    async def attach(self, backend: Optional[SharedCacheBackend]):
+        """Recebe as atualizações publicadas pelos demais workers."""
+        self.backend = backend
+        if backend is not None:
+            await backend.subscribe(self.channel, self._on_message)
+
+    def _on_message(self, message: str):
+        self._apply(json_util.loads(message))
+
+    async def record(self, users: Iterable[Dict[str, Any]]):
+        """Atualiza os rankings com os usuários alterados (com `LEADERBOARD_PROJECTION`)."""
+        for user in users:
+            self._apply(user)
+            if self.backend is None:
+                continue
+            message = {key: user.get(key) for key in LEADERBOARD_PROJECTION}
+            message["_id"] = str(user.get("_id", user.get("id")))
+            try:
+                await self.backend.publish(self.channel, json_util.dumps(message))
+            except Exception as e:
+                logger.warning(f"Erro ao publicar atualização de ranking: {e}")
+
+    def _entry(self, user_id: str, rank: int) -> Dict[str, Any]:
+        profile = self._profiles[user_id]
+        return {
+            "rank": rank + 1,
+            "id": user_id,
+            "name": profile["name"],
+            "level": profile["level"],
+            "xp": profile["xp"],
+        }
+
+    def top(self, scope: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        board = self._boards.get(scope, RankedSet())
+        return {
+            "scope": scope,
+            "total": len(board),
+            "items": [
+                self._entry(user_id, offset + i)
+                for i, (user_id, _) in enumerate(board.top(limit, offset))
+            ],
+        }
+
+    def rank(self, scope: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Posição do usuário no ranking, ou `None` se ele não faz parte dele."""
+        board = self._boards.get(scope)
+        position = board.rank(user_id) if board is not None else None
+        if position is None:
+            return None
+        return {"scope": scope, "total": len(board), **self._entry(user_id, position)}
+
+
+leaderboards = Leaderboards()
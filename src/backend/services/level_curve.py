@@ -0,0 +1,76 @@
+"""
+Curva de níveis da gamificação.
+
+Cada nível precisa de 10% mais XP que o anterior (com truncamento inteiro,
+como na regra original). Os limiares de XP acumulado são calculados uma única
+vez, na inicialização, e a conversão de XP total em nível é feita por busca
+binária, independente do tamanho do XP concedido.
+"""
+import os
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+FIRST_LEVEL_XP = 100
+LEVEL_XP_GROWTH = 1.1
+DEFAULT_MAX_LEVEL = int(os.getenv("MAX_USER_LEVEL", "100"))
+
+
+class LevelCurve:
+    """Tabela pré-calculada de limiares de XP por nível."""
+
+    def __init__(
+        self,
+        max_level: int = DEFAULT_MAX_LEVEL,
+        first_level_xp: int = FIRST_LEVEL_XP,
+        growth: float = LEVEL_XP_GROWTH,
+    ):
+        if max_level < 1:
+            raise ValueError("O nível máximo deve ser pelo menos 1")
+        self.max_level = max_level
+
+        # level_xp[i]: XP necessário para sair do nível i + 1
+        self.level_xp: List[int] = []
+        # thresholds[i]: XP total acumulado para alcançar o nível i + 2
+        self.thresholds: List[int] = []
+
+        total_xp, level_xp = 0, first_level_xp
+        for _ in range(max_level):
+            self.level_xp.append(level_xp)
+            if len(self.thresholds) < max_level - 1:
+                total_xp += level_xp
+                self.thresholds.append(total_xp)
+            level_xp = int(level_xp * growth)
+
+    def level_for(self, total_xp: int) -> int:
+        """Retorna o nível correspondente ao XP total acumulado."""
+        return 1 + bisect_right(self.thresholds, max(total_xp, 0))
+
+    def level_start_xp(self, level: int) -> int:
+        """XP total acumulado no início do nível informado."""
+        level = min(max(level, 1), self.max_level)
+        return self.thresholds[level - 2] if level > 1 else 0
+
+    def progress(self, total_xp: int) -> Tuple[int, int, int]:
+        """
+        Converte XP total em (nível, XP dentro do nível, XP do próximo nível).
+        """
+        level = self.level_for(total_xp)
+        xp_in_level = max(total_xp, 0) - self.level_start_xp(level)
+        return level, xp_in_level, self.level_xp[level - 1]
+
+
+_level_curve: Optional[LevelCurve] = None
+
+
+def init_level_curve(max_level: int = DEFAULT_MAX_LEVEL) -> LevelCurve:
+    """Pré-calcula a curva de níveis (chamado na inicialização da aplicação)."""
+    global _level_curve
+    _level_curve = LevelCurve(max_level=max_level)
+    return _level_curve
+
+
+def get_level_curve() -> LevelCurve:
+    """Retorna a curva de níveis, criando-a se ainda não foi inicializada."""
+    if _level_curve is None:
+        return init_level_curve()
+    return _level_curve
@@ -0,0 +1,272 @@
+"""
+Envio em tempo real das alterações de perfil e de solicitações.
+
+Cada worker mantém um único observador do MongoDB (`RealtimeHub`), que
+repassa as alterações às conexões inscritas (Server-Sent Events). Os tópicos
+são `user:<id>` (XP, nível e conquistas) e `request:<id>` (status,
+responsável e comentários).
+
+O observador usa um change stream do banco, filtrado no servidor para as
+atualizações que tocam os campos de `WATCHED_FIELDS`: as demais (ex.: o
+`last_active` gravado pelo registro de atividade) não custam a leitura do
+documento completo. Falhas do change stream são repetidas com espera
+crescente; apenas sem suporte a change streams (servidor fora de um replica
+set, ou o mongomock) ele passa a consultar periodicamente, pelo
+`updated_at`, os documentos que têm inscritos.
+
+Cada conexão tem sua própria fila limitada. Quando um cliente lento deixa a
+fila encher, o evento mais antigo é descartado: o observador nunca espera
+por uma conexão, e os demais clientes não são afetados. Como os eventos
+trazem o estado atual, o cliente que perdeu eventos recebe o mais recente.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure, PyMongoError
+
+from utils.responses import dumps
+
+logger = logging.getLogger("papo_social_api")
+
+# Campos enviados por coleção; alterações em outros campos não geram eventos
+WATCHED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "users": ("xp", "level", "achievements"),
+    "requests": ("status", "assigned_to", "comments_count", "last_comment"),
+}
+TOPIC_KINDS = {"users": "user", "requests": "request"}
+
+# Códigos de erro do servidor
+CHANGE_STREAMS_UNSUPPORTED = 40573  # Fora de um replica set
+CHANGE_STREAM_FATAL = 280
+CHANGE_STREAM_HISTORY_LOST = 286  # Ponto de retomada fora do oplog
+
+
+def watched_projection(collection: str) -> Dict[str, int]:
+    return dict.fromkeys(WATCHED_FIELDS[collection], 1)
+
+
+def changes_filter(collection: str) -> Dict[str, Any]:
+    """
+    Filtro do change stream para as alterações de `collection` que tocam os
+    campos observados. `updatedFields` pode trazer caminhos como
+    `achievements.3`; compara-se o primeiro segmento de cada caminho.
+    """
+    touched = {"$filter": {
+        "input": {"$objectToArray": "$updateDescription.updatedFields"},
+        "cond": {"$in": [
+            {"$arrayElemAt": [{"$split": ["$$this.k", "."]}, 0]}, list(WATCHED_FIELDS[collection])
+        ]},
+    }}
+    return {"ns.coll": collection, "$or": [
+        {"operationType": "replace"},
+        {"operationType": "update", "$expr": {"$gt": [{"$size": touched}, 0]}},
+    ]}
+
+
+def user_topic(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+def request_topic(request_id: Any) -> str:
+    return f"request:{request_id}"
+
+
+class Subscription:
+    """Conexão inscrita em um conjunto de tópicos, com fila própria e limitada."""
+
+    def __init__(self, topics: Iterable[str], maxsize: int):
+        self.topics: FrozenSet[str] = frozenset(topics)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]):
+        """Enfileira sem esperar; com a fila cheia, descarta o evento mais antigo."""
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self._queue.get()
+
+
+def format_sse(event: Dict[str, Any]) -> bytes:
+    """Evento no formato Server-Sent Events (`event:` + `data:` em JSON)."""
+    return b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+
+class RealtimeHub:
+    """Observador das alterações deste worker e suas inscrições."""
+
+    def __init__(
+        self,
+        queue_size: int = 100,
+        poll_interval: float = 2.0,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0,
+    ):
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.mode: Optional[str] = None
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        # Último estado enviado por tópico: evita eventos repetidos e detecta subida de nível
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._worker: Optional[asyncio.Task] = None
+        self.published = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self, db: AsyncIOMotorDatabase, use_change_stream: bool = True):
+        """Inicia o observador (chamado no lifespan)."""
+        self.db = db
+        self._worker = asyncio.create_task(self._run(use_change_stream))
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(topics, self.queue_size)
+        for topic in subscription.topics:
+            self._subscriptions.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self._subscriptions.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[topic]
+                self._snapshots.pop(topic, None)
+
+    def publish(self, topic: str, event: Dict[str, Any]):
+        for subscription in self._subscriptions.get(topic, ()):
+            subscription.offer(event)
+        self.published += 1
+
+    @staticmethod
+    def _event(kind: str, document: Dict[str, Any], state: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+        event = {"type": kind, "id": str(document["_id"]), **state}
+        if kind == "user":
+            event["level_up"] = previous is not None and (state["level"] or 1) > (previous["level"] or 1)
+        return event
+
+    def send_current(self, subscription: Subscription, collection: str, document: Dict[str, Any]):
+        """Envia à nova inscrição o estado atual de um documento (lido pela rota)."""
+        kind = TOPIC_KINDS[collection]
+        state = {field: document.get(field) for field in WATCHED_FIELDS[collection]}
+        self._snapshots.setdefault(f"{kind}:{document['_id']}", state)
+        subscription.offer(self._event(kind, document, state, None))
+
+    def dispatch(self, collection: str, document: Dict[str, Any]):
+        """Publica o estado de um documento alterado, se ele tem inscritos e mudou."""
+        kind = TOPIC_KINDS[collection]
+        topic = f"{kind}:{document['_id']}"
+        if topic not in self._subscriptions:
+            return
+        state = {field: document.get(field) for field in WATCHED_FIELDS[collection]}
+        previous = self._snapshots.get(topic)
+        if state == previous:
+            return
+        self._snapshots[topic] = state
+        self.publish(topic, self._event(kind, document, state, previous))
+
+    def _subscribed_ids(self, collection: str) -> list:
+        prefix = f"{TOPIC_KINDS[collection]}:"
+        return [ObjectId(topic[len(prefix):]) for topic in self._subscriptions if topic.startswith(prefix)]
+
+    async def _run(self, use_change_stream: bool):
+        if use_change_stream:
+            try:
+                await self._watch()
+                return
+            except OperationFailure as e:
+                logger.warning(f"Change streams indisponíveis, usando consultas periódicas: {e}")
+        await self._poll()
+
+    async def _watch(self):
+        """
+        Repassa as alterações do change stream. Só retorna com exceção
+        (`OperationFailure`) quando o servidor não suporta change streams.
+        """
+        self.mode = "change_stream"
+        pipeline = [{"$match": {"$or": [changes_filter(collection) for collection in WATCHED_FIELDS]}}]
+        resume_token = None
+        delay = self.retry_delay
+        while True:
+            try:
+                async with self.db.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    delay = self.retry_delay
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        if change.get("fullDocument") is not None:
+                            self.dispatch(change["ns"]["coll"], change["fullDocument"])
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    raise
+                if resume_token is not None and e.code in (CHANGE_STREAM_FATAL, CHANGE_STREAM_HISTORY_LOST):
+                    # Ponto de retomada perdido: recomeça a partir do momento atual
+                    logger.warning(f"Change stream não pôde ser retomado, reiniciando: {e}")
+                    resume_token = None
+                else:
+                    logger.warning(f"Falha no change stream, nova tentativa em {delay:.0f}s: {e}")
+            except PyMongoError as e:
+                logger.warning(f"Change stream interrompido, nova tentativa em {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def _poll(self):
+        self.mode = "polling"
+        since = datetime.now()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            now = datetime.now()
+            for collection in WATCHED_FIELDS:
+                ids = self._subscribed_ids(collection)
+                if not ids:
+                    continue
+                try:
+                    async for document in self.db[collection].find(
+                        {"_id": {"$in": ids}, "updated_at": {"$gte": since}}, watched_projection(collection)
+                    ):
+                        self.dispatch(collection, document)
+                except PyMongoError as e:
+                    logger.error(f"Erro ao consultar alterações de {collection}: {e}")
+            since = now
+
+    def stats(self) -> Dict[str, Any]:
+        subscriptions = {s for subscribers in self._subscriptions.values() for s in subscribers}
+        return {
+            "running": self.running,
+            "mode": self.mode,
+            "connections": len(subscriptions),
+            "topics": len(self._subscriptions),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscriptions),
+        }
+
+
+# Observador de alterações deste worker (iniciado no lifespan)
+realtime_hub = RealtimeHub(
+    queue_size=int(os.getenv("REALTIME_QUEUE_SIZE", "100")),
+    poll_interval=float(os.getenv("REALTIME_POLL_SECONDS", "2.0")),
+)
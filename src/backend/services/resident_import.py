@@ -0,0 +1,137 @@
+"""
+Importação em massa de moradores a partir de planilhas (CSV ou NDJSON).
+
+Os registros são lidos do upload sob demanda, validados em lotes com um
+`TypeAdapter(List[ResidentModel])` e gravados com `bulk_write` não ordenado,
+um lote por vez. A memória usada depende do tamanho do lote, não do arquivo.
+
+A importação é idempotente: o email identifica o morador, então reenviar a
+mesma planilha atualiza os cadastros em vez de duplicá-los.
+"""
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import TypeAdapter, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models.resident import ResidentModel
+from utils.ingest import Row, RowParseError
+
+IMPORT_BATCH_SIZE = int(os.getenv("RESIDENT_IMPORT_BATCH_SIZE", "1000"))
+# Limite de erros detalhados no relatório (os demais são apenas contados)
+MAX_REPORTED_ERRORS = 1000
+
+_residents_adapter = TypeAdapter(List[ResidentModel])
+
+
+class ImportReport:
+    """Totais da importação e os erros por linha."""
+
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add_error(self, row: int, errors: List[Dict[str, Any]]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _validate_batch(
+    batch: List[Tuple[int, Dict[str, Any]]],
+    report: ImportReport,
+) -> List[Tuple[int, ResidentModel]]:
+    """
+    Valida o lote inteiro de uma vez.
+
+    Se alguma linha for inválida, seus erros entram no relatório e as
+    demais linhas são validadas novamente, sem ela.
+    """
+    try:
+        residents = _residents_adapter.validate_python([row for _, row in batch])
+        return [(number, resident) for (number, _), resident in zip(batch, residents)]
+    except ValidationError as e:
+        row_errors: Dict[int, List[Dict[str, Any]]] = {}
+        for error in e.errors():
+            index, *loc = error["loc"]
+            row_errors.setdefault(index, []).append({"loc": loc, "msg": error["msg"]})
+
+    for index in sorted(row_errors):
+        report.add_error(batch[index][0], row_errors[index])
+    valid = [entry for index, entry in enumerate(batch) if index not in row_errors]
+    return _validate_batch(valid, report) if valid else []
+
+
+def _upsert(resident: ResidentModel, now: datetime) -> UpdateOne:
+    # Só as colunas presentes no arquivo sobrescrevem o residente existente;
+    # os valores padrão do modelo (role, is_active, joined_date) valem apenas
+    # para residentes novos, sem rebaixar um presidente reimportado
+    provided = resident.model_dump(exclude={"id"}, exclude_unset=True, exclude_none=True)
+    defaults = resident.model_dump(exclude={"id", *provided}, exclude_none=True)
+    provided["updated_at"] = now
+    return UpdateOne(
+        {"email": provided["email"]},
+        {"$set": provided, "$setOnInsert": defaults},
+        upsert=True,
+    )
+
+
+async def _write_batch(
+    db: AsyncIOMotorDatabase,
+    residents: List[Tuple[int, ResidentModel]],
+    report: ImportReport,
+):
+    now = datetime.now()
+    operations = [_upsert(resident, now) for _, resident in residents]
+    try:
+        result = await db["residents"].bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for error in details.get("writeErrors", []):
+            report.add_error(
+                residents[error["index"]][0],
+                [{"loc": [], "msg": error.get("errmsg", "Write error")}],
+            )
+    report.inserted += details.get("nUpserted", 0)
+    report.updated += details.get("nMatched", 0)
+
+
+async def import_residents(db: AsyncIOMotorDatabase, rows: AsyncIterator[Row]) -> Dict[str, Any]:
+    """Valida e grava os registros em lotes de `IMPORT_BATCH_SIZE`."""
+    report = ImportReport()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    async def flush():
+        valid = _validate_batch(batch, report)
+        if valid:
+            await _write_batch(db, valid, report)
+        batch.clear()
+
+    async for number, row in rows:
+        report.received += 1
+        if isinstance(row, RowParseError):
+            report.add_error(number, [{"loc": [], "msg": str(row)}])
+            continue
+        batch.append((number, row))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return report.to_dict()
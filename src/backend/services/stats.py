@@ -0,0 +1,264 @@
+"""
+Estatísticas materializadas por associação e por comunidade.
+
+Os painéis das associações leem um único documento da coleção
+`scope_stats` (`_id` no formato `association:<id>` / `community:<id>`) em vez
+de agregar usuários e solicitações a cada acesso. Os documentos são mantidos
+por duas agregações que terminam em `$merge`:
+
+- usuários: membros, usuários ativos nos últimos `ACTIVE_DAYS` dias e nível
+  médio;
+- solicitações em aberto: total e por categoria, atribuídas às associações
+  e comunidades de quem as criou.
+
+A atualização incremental (`refresh`) recalcula apenas os escopos dos
+usuários e solicitações alterados desde a execução anterior (pelos campos
+`updated_at`, `created_at` e `last_active`). A reconstrução completa
+(`rebuild`) recalcula tudo e remove escopos que ficaram sem membros; ela
+também atualiza os "usuários ativos", que mudam com a passagem do tempo.
+
+Com vários workers, cada ciclo é executado por apenas um deles: o worker
+que obtém a concessão no documento de controle (`scope_stats_jobs`), que
+também guarda o horário da última execução.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+from models.request import OPEN_REQUEST_STATUSES
+from services.leaderboard import association_scope, community_scope
+
+logger = logging.getLogger("papo_social_api")
+
+STATS_COLLECTION = "scope_stats"
+JOBS_COLLECTION = "scope_stats_jobs"
+JOB_ID = "scope_stats"
+# Dias sem acesso após os quais o membro deixa de contar como ativo
+ACTIVE_DAYS = int(os.getenv("STATS_ACTIVE_DAYS", "7"))
+
+
+def _scopes_expression(associations: str, communities: str) -> Dict[str, Any]:
+    """Expressão com os `_id` de escopo de um usuário (`association:x`, `community:y`)."""
+    def prefixed(field: str, prefix: str) -> Dict[str, Any]:
+        return {"$map": {"input": {"$ifNull": [field, []]}, "in": {"$concat": [prefix, "$$this"]}}}
+
+    return {"$concatArrays": [
+        prefixed(associations, association_scope("")),
+        prefixed(communities, community_scope("")),
+    ]}
+
+
+def _scope_filter(scopes: Optional[Set[str]], prefix: str = "") -> Dict[str, Any]:
+    """Filtro dos usuários que pertencem a algum dos escopos."""
+    if scopes is None:
+        return {}
+    associations = [s.split(":", 1)[1] for s in scopes if s.startswith(association_scope(""))]
+    communities = [s.split(":", 1)[1] for s in scopes if s.startswith(community_scope(""))]
+    return {"$or": [
+        {f"{prefix}associations": {"$in": associations}},
+        {f"{prefix}communities": {"$in": communities}},
+    ]}
+
+
+def member_stats_pipeline(scopes: Optional[Set[str]], now: datetime) -> List[Dict[str, Any]]:
+    """Membros, ativos e nível médio por escopo (todos, com `scopes=None`)."""
+    active_since = now - timedelta(days=ACTIVE_DAYS)
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": _scope_filter(scopes)},
+        {"$project": {
+            "level": {"$ifNull": ["$level", 1]},
+            "active": {"$cond": [{"$gte": ["$last_active", active_since]}, 1, 0]},
+            "scope": _scopes_expression("$associations", "$communities"),
+        }},
+        {"$unwind": "$scope"},
+    ]
+    if scopes is not None:
+        # O usuário pode pertencer também a escopos que não foram alterados
+        pipeline.append({"$match": {"scope": {"$in": sorted(scopes)}}})
+    pipeline.append({"$group": {
+        "_id": "$scope",
+        "members": {"$sum": 1},
+        "active_users": {"$sum": "$active"},
+        "average_level": {"$avg": "$level"},
+    }})
+    return pipeline
+
+
+def open_request_stats_pipeline(scopes: Optional[Set[str]]) -> List[Dict[str, Any]]:
+    """Solicitações em aberto por escopo e categoria."""
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": {"status": {"$in": OPEN_REQUEST_STATUSES}}},
+        {"$lookup": {"from": "users", "localField": "created_by", "foreignField": "_id", "as": "creator"}},
+        {"$unwind": "$creator"},
+        {"$project": {
+            "category": 1,
+            "scope": _scopes_expression("$creator.associations", "$creator.communities"),
+        }},
+        {"$unwind": "$scope"},
+    ]
+    if scopes is not None:
+        pipeline.append({"$match": {"scope": {"$in": sorted(scopes)}}})
+    pipeline += [
+        {"$group": {"_id": {"scope": "$scope", "category": "$category"}, "count": {"$sum": 1}}},
+        {"$group": {
+            "_id": "$_id.scope",
+            "open_requests": {"$push": {"k": "$_id.category", "v": "$count"}},
+            "open_requests_total": {"$sum": "$count"},
+        }},
+        {"$project": {"open_requests": {"$arrayToObject": "$open_requests"}, "open_requests_total": 1}},
+    ]
+    return pipeline
+
+
+async def _merge(collection: AsyncIOMotorCollection, pipeline: List[Dict[str, Any]], stamp: Dict[str, Any]):
+    """
+    Executa a agregação e mescla o resultado em `scope_stats` com `$merge`.
+
+    Servidores sem `$merge` (anteriores ao MongoDB 4.2, e o mongomock)
+    recebem o resultado no cliente e o gravam com `bulk_write`.
+    """
+    merge = [
+        {"$addFields": {key: {"$literal": value} for key, value in stamp.items()}},
+        {"$merge": {"into": STATS_COLLECTION, "on": "_id", "whenMatched": "merge", "whenNotMatched": "insert"}},
+    ]
+    try:
+        await collection.aggregate(pipeline + merge).to_list(None)
+        return
+    except (OperationFailure, NotImplementedError) as e:
+        logger.debug(f"$merge indisponível, gravando estatísticas pelo cliente: {e}")
+
+    operations = [
+        UpdateOne({"_id": row.pop("_id")}, {"$set": {**row, **stamp}}, upsert=True)
+        async for row in collection.aggregate(pipeline)
+    ]
+    if operations:
+        await collection.database[STATS_COLLECTION].bulk_write(operations, ordered=False)
+
+
+async def _refresh_scopes(db: AsyncIOMotorDatabase, scopes: Optional[Set[str]], now: datetime):
+    """Recalcula os escopos informados (todos, com `scopes=None`)."""
+    stats = db[STATS_COLLECTION]
+    await _merge(db["users"], member_stats_pipeline(scopes, now), {"refreshed_at": now})
+    await _merge(db["requests"], open_request_stats_pipeline(scopes), {"requests_refreshed_at": now})
+
+    selected: Dict[str, Any] = {} if scopes is None else {"_id": {"$in": sorted(scopes)}}
+    # Escopos sem nenhuma solicitação em aberto não aparecem na agregação
+    await stats.update_many(
+        {**selected, "requests_refreshed_at": {"$ne": now}},
+        {"$set": {"open_requests": {}, "open_requests_total": 0, "requests_refreshed_at": now}},
+    )
+    # Escopos sem membros não aparecem na agregação dos usuários
+    await stats.delete_many({**selected, "refreshed_at": {"$ne": now}})
+
+
+async def changed_scopes(db: AsyncIOMotorDatabase, since: datetime) -> Set[str]:
+    """Escopos com usuários ou solicitações alterados desde `since`."""
+    changed_users = {"$or": [{"updated_at": {"$gte": since}}, {"last_active": {"$gte": since}}]}
+    changed_requests = {"$or": [{"created_at": {"$gte": since}}, {"updated_at": {"$gte": since}}]}
+    creators = await db["requests"].distinct("created_by", changed_requests)
+
+    scopes: Set[str] = set()
+    projection = {"associations": 1, "communities": 1}
+    async for user in db["users"].find({"$or": [changed_users, {"_id": {"$in": creators}}]}, projection):
+        scopes.update(association_scope(a) for a in user.get("associations") or [])
+        scopes.update(community_scope(c) for c in user.get("communities") or [])
+    return scopes
+
+
+async def rebuild_stats(db: AsyncIOMotorDatabase, now: Optional[datetime] = None):
+    """Recalcula as estatísticas de todos os escopos."""
+    await _refresh_scopes(db, None, now or datetime.now())
+
+
+async def refresh_stats(db: AsyncIOMotorDatabase, since: datetime, now: Optional[datetime] = None) -> int:
+    """Recalcula os escopos alterados desde `since`; retorna quantos foram recalculados."""
+    scopes = await changed_scopes(db, since)
+    if scopes:
+        await _refresh_scopes(db, scopes, now or datetime.now())
+    return len(scopes)
+
+
+async def get_scope_stats(db: AsyncIOMotorDatabase, scope: str) -> Optional[Dict[str, Any]]:
+    """Estatísticas materializadas de um escopo (uma leitura por `_id`)."""
+    return await db[STATS_COLLECTION].find_one({"_id": scope}, {"requests_refreshed_at": 0})
+
+
+class StatsRefresher:
+    """Executa a atualização incremental e a reconstrução periódica das estatísticas."""
+
+    def __init__(self, refresh_interval: float = 60.0, rebuild_interval: float = 3600.0):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        """Inicia os ciclos de atualização (chamado no lifespan)."""
+        self.db = db
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _claim(self, now: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Obtém a concessão do ciclo atual; retorna o estado da execução
+        anterior, ou `None` se outro worker está com a concessão.
+        """
+        try:
+            return await self.db[JOBS_COLLECTION].find_one_and_update(
+                {"_id": JOB_ID, "$or": [{"lease_until": {"$lt": now}}, {"lease_until": None}]},
+                {"$set": {"lease_until": now + timedelta(seconds=self.refresh_interval)}},
+                upsert=True,
+            ) or {}
+        except DuplicateKeyError:
+            return None
+
+    async def run_once(self, now: Optional[datetime] = None) -> Optional[str]:
+        """Executa um ciclo; retorna `"rebuild"`, `"refresh"` ou `None` (sem concessão)."""
+        now = now or datetime.now()
+        previous = await self._claim(now)
+        if previous is None:
+            return None
+
+        last_rebuild = previous.get("last_rebuild")
+        last_refresh = previous.get("last_refresh")
+        if last_rebuild is None or now - last_rebuild >= timedelta(seconds=self.rebuild_interval):
+            await rebuild_stats(self.db, now)
+            done = {"last_rebuild": now, "last_refresh": now}
+        else:
+            await refresh_stats(self.db, last_refresh or last_rebuild, now)
+            done = {"last_refresh": now}
+        await self.db[JOBS_COLLECTION].update_one({"_id": JOB_ID}, {"$set": {**done, "lease_until": None}})
+        return "rebuild" if "last_rebuild" in done else "refresh"
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except PyMongoError as e:
+                logger.error(f"Erro ao atualizar estatísticas das associações: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+# Atualização das estatísticas (iniciada no lifespan)
+stats_refresher = StatsRefresher(
+    refresh_interval=float(os.getenv("STATS_REFRESH_SECONDS", "60")),
+    rebuild_interval=float(os.getenv("STATS_REBUILD_SECONDS", "3600")),
+)
@@ -0,0 +1,156 @@
+"""
+Extração do nome a partir da transcrição do onboarding por voz.
+
+As frases de apresentação ("meu nome é", "me chamo", ...) são compiladas em
+uma única expressão regular, que percorre a transcrição uma vez: vale a
+apresentação que aparece primeiro no texto. As frases casam apenas palavras
+inteiras e aceitam as variações sem acento comuns em transcrições
+automáticas ("meu nome e", "voce pode me chamar de").
+"""
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern
+
+DEFAULT_NAME = "Novo Usuário"
+MAX_NAME_WORDS = 3
+# Confiança quando não há frase de apresentação e o nome é o início da fala
+FALLBACK_CONFIDENCE = 0.3
+
+# Partículas que podem aparecer no meio do nome ("Ana de Souza")
+NAME_PARTICLES = {"da", "das", "de", "do", "dos", "e"}
+# Palavras que encerram o nome ("Ana Souza e eu moro no bloco B")
+STOP_WORDS = {
+    "aqui", "bloco", "casa", "e", "eu", "moro", "morador", "moradora",
+    "muito", "obrigada", "obrigado", "prazer", "sou", "tenho", "vizinha", "vizinho",
+}
+
+_ACCENTS = {
+    "a": "aáàâã", "e": "eéê", "i": "ií", "o": "oóôõ", "u": "uúü", "c": "cç",
+}
+_WORD = r"[^\W\d_]+(?:['-][^\W\d_]+)*"
+
+
+@dataclass(frozen=True)
+class IntroPattern:
+    """Frase de apresentação seguida do nome."""
+
+    phrase: str
+    confidence: float
+
+
+@dataclass(frozen=True)
+class NameExtraction:
+    name: str
+    confidence: float
+    pattern: Optional[str] = None
+
+
+INTRO_PATTERNS: List[IntroPattern] = [
+    IntroPattern("meu nome é", 0.95),
+    IntroPattern("me chamo", 0.95),
+    IntroPattern("pode me chamar de", 0.9),
+    IntroPattern("podem me chamar de", 0.9),
+    IntroPattern("me chame de", 0.9),
+    IntroPattern("me chamam de", 0.85),
+    IntroPattern("aqui é", 0.8),
+    IntroPattern("aqui quem fala é", 0.85),
+    IntroPattern("quem fala é", 0.85),
+    IntroPattern("sou", 0.6),
+]
+
+_compiled: Optional[Pattern[str]] = None
+_by_phrase: Dict[str, IntroPattern] = {}
+
+
+def _fold(text: str) -> str:
+    """Minúsculas sem acentos, com espaços normalizados."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def _phrase_regex(phrase: str) -> str:
+    words = []
+    for word in _fold(phrase).split():
+        words.append("".join(
+            f"[{_ACCENTS[c]}]" if c in _ACCENTS else re.escape(c) for c in word
+        ))
+    return r"\s+".join(words)
+
+
+def _build_regex(patterns: List[IntroPattern]) -> Pattern[str]:
+    # Frases mais longas primeiro: na mesma posição, "me chame de" vence "me chamo"
+    phrases = sorted((_phrase_regex(p.phrase) for p in patterns), key=len, reverse=True)
+    particles = "|".join(sorted(NAME_PARTICLES))
+    return re.compile(
+        rf"(?<!\w)(?P<intro>{'|'.join(phrases)})[\s,:]+"
+        # Artigo opcional ("sou a Maria") e o nome, que não começa por partícula
+        rf"(?:(?:o|a)\s+)?(?!(?:{particles})\b)"
+        rf"(?P<name>{_WORD}(?:\s+{_WORD}){{0,{2 * MAX_NAME_WORDS}}})",
+        re.IGNORECASE,
+    )
+
+
+def _regex() -> Pattern[str]:
+    global _compiled
+    if _compiled is None:
+        _by_phrase.clear()
+        _by_phrase.update((_fold(p.phrase), p) for p in INTRO_PATTERNS)
+        _compiled = _build_regex(INTRO_PATTERNS)
+    return _compiled
+
+
+def register_intro_pattern(pattern: IntroPattern) -> IntroPattern:
+    """Adiciona uma frase de apresentação e recompila a expressão."""
+    global _compiled
+    if any(_fold(existing.phrase) == _fold(pattern.phrase) for existing in INTRO_PATTERNS):
+        raise ValueError(f"Frase de apresentação já registrada: {pattern.phrase}")
+    INTRO_PATTERNS.append(pattern)
+    _compiled = None
+    return pattern
+
+
+def _name_words(candidate: str) -> List[str]:
+    """Palavras do nome, até a primeira palavra de parada."""
+    words: List[str] = []
+    for word in candidate.split():
+        folded = _fold(word)
+        if folded in NAME_PARTICLES and words:
+            words.append(word)
+            continue
+        if folded in STOP_WORDS:
+            break
+        words.append(word)
+        if sum(_fold(w) not in NAME_PARTICLES for w in words) == MAX_NAME_WORDS:
+            break
+    # Partículas no fim não fazem parte do nome ("Ana Souza e ...")
+    while words and _fold(words[-1]) in NAME_PARTICLES:
+        words.pop()
+    return words
+
+
+def _format_name(words: List[str]) -> str:
+    return " ".join(
+        word.lower() if _fold(word) in NAME_PARTICLES else word[:1].upper() + word[1:].lower()
+        for word in words
+    )
+
+
+def extract_name(transcript: str) -> NameExtraction:
+    """
+    Retorna o nome encontrado na transcrição e a confiança da extração.
+
+    Sem frase de apresentação, usa as duas primeiras palavras com confiança
+    baixa; sem palavras aproveitáveis, retorna `DEFAULT_NAME` com confiança 0.
+    """
+    for match in _regex().finditer(transcript):
+        words = _name_words(match.group("name"))
+        if words:
+            pattern = _by_phrase[_fold(match.group("intro"))]
+            return NameExtraction(_format_name(words), pattern.confidence, pattern.phrase)
+
+    words = re.findall(_WORD, transcript)[:2]
+    name = _format_name(words)
+    if len(name) < 2:
+        return NameExtraction(DEFAULT_NAME, 0.0)
+    return NameExtraction(name, FALLBACK_CONFIDENCE)
@@ -2,6 +2,7 @@
 import os
 import sys
 import pytest
+import pytest_asyncio
 import logging
 from fastapi.testclient import TestClient
 from bson import ObjectId
@@ -25,7 +26,9 @@ logger = logging.getLogger("papo_social_tests")
 # Força o ambiente de teste
 os.environ["NODE_ENV"] = "test"
 
+from config.indexes import ensure_indexes
 from main import app, get_database
+from services.cache import user_cache
 
 # Determina se deve usar mongomock ou MongoDB real
 USE_MOCK_MONGODB = os.environ.get("USE_MOCK_MONGODB", "0") == "1"
@@ -43,11 +46,12 @@ if USE_MOCK_MONGODB:
     logger.info("Usando mongomock para testes")
     from mongomock_motor import AsyncMongoMockClient
     
-    # Cliente e database mock
+    # Cliente mock compartilhado (cada cliente mongomock tem seus próprios dados)
+    mock_client = AsyncMongoMockClient()
+    
     async def get_test_database():
         """Retorna database mockada para testes."""
-        client = AsyncMongoMockClient()
-        return client[TEST_DATABASE]
+        return mock_client[TEST_DATABASE]
 else:
     logger.info(f"Usando MongoDB real para testes: {TEST_MONGODB_URL} - DB: {TEST_DATABASE}")
     
@@ -77,13 +81,15 @@ def test_client():
     with TestClient(app) as client:
         yield client
 
-@pytest.fixture(autouse=True)
+@pytest_asyncio.fixture(autouse=True)
 async def setup_test_db():
     """Prepara o banco de dados para testes."""
     test_db = await get_test_database()
+    await ensure_indexes(test_db)
+    user_cache.clear()
     
     # Limpa coleções antes do teste
-    collections = ["residents", "requests", "users"]
+    collections = ["residents", "requests", "request_comments", "users", "scope_stats"]
     for collection_name in collections:
         collection = test_db[collection_name]
         await collection.delete_many({})
@@ -71,4 +71,151 @@ def test_create_resident_validation(test_client):
     errors = response.json()["detail"]
     assert any("name" in error["loc"] for error in errors)
     assert any("email" in error["loc"] for error in errors)
-    assert any("phone" in error["loc"] for error in errors) 
\ No newline at end of file
+    assert any("phone" in error["loc"] for error in errors) 
+
+def test_add_user_xp_levels_up(test_client):
+    """Test that awarding XP accumulates it and recomputes the level."""
+    user = test_client.post("/onboarding/voice", json={"transcript": "Meu nome é Ana Souza"}).json()
+
+    response = test_client.put(f"/users/{user['id']}/xp", json={"xp": 250})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["xp"] == 250
+    assert data["level"] == 3  # 100 XP para o nível 2, mais 110 para o nível 3
+    assert data["level_progress"] == {"level": 3, "xp": 40, "next_level_xp": 121}
+
+    response = test_client.put(f"/users/{user['id']}/xp", json={"xp": 10})
+    assert response.json()["xp"] == 260
+    assert response.json()["level"] == 3
+
+def test_add_user_xp_validation(test_client):
+    """Test XP award error handling."""
+    user = test_client.post("/onboarding/voice", json={"transcript": "Meu nome é Ana Souza"}).json()
+
+    assert test_client.put(f"/users/{user['id']}/xp", json={"xp": 0}).status_code == 400
+    assert test_client.put("/users/invalid-id/xp", json={"xp": 10}).status_code == 400
+    assert test_client.put(f"/users/{ObjectId()}/xp", json={"xp": 10}).status_code == 404
+
+def test_add_users_xp_batch(test_client):
+    """Test awarding XP to several users in one request."""
+    ana = test_client.post("/onboarding/voice", json={"transcript": "Meu nome é Ana Souza"}).json()
+    joao = test_client.post("/onboarding/voice", json={"transcript": "Me chamo João Lima"}).json()
+    missing_id = str(ObjectId())
+
+    response = test_client.post("/users/xp/batch", json={"awards": [
+        {"user_id": ana["id"], "xp": 60},
+        {"user_id": joao["id"], "xp": 20},
+        {"user_id": ana["id"], "xp": 50},
+        {"user_id": missing_id, "xp": 10},
+        {"user_id": "invalid-id", "xp": 10},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    results = {result["user_id"]: result for result in data["results"]}
+
+    assert data["updated"] == 2
+    assert results[ana["id"]]["xp"] == 110
+    assert results[ana["id"]]["level"] == 2
+    assert results[ana["id"]]["level_up"] is True
+    assert results[ana["id"]]["level_progress"] == {"level": 2, "xp": 10, "next_level_xp": 110}
+    assert results[joao["id"]]["level_up"] is False
+    assert results[missing_id]["status"] == "not_found"
+    assert results["invalid-id"]["status"] == "invalid_id"
+
+    # O resultado em lote é o mesmo da rota individual
+    single = test_client.put(f"/users/{joao['id']}/xp", json={"xp": 80}).json()
+    assert single["xp"] == 100
+    assert single["level"] == 2
+
+def test_voice_onboarding_stores_welcome_achievement(test_client):
+    """Test that the welcome achievement is saved with the new user."""
+    response = test_client.post("/onboarding/voice", json={"transcript": "Meu nome é Ana Souza"})
+    assert response.status_code == 200
+    user = response.json()
+    assert user["name"] == "Ana Souza"
+    assert [achievement["id"] for achievement in user["achievements"]] == ["voice_onboarding"]
+
+    stored = test_client.get(f"/api/users/{user['id']}").json()
+    assert [achievement["id"] for achievement in stored["achievements"]] == ["voice_onboarding"]
+
+def test_voice_interactions_are_queued(test_client):
+    """Test that audio metrics are accepted without waiting for the write."""
+    user = test_client.post("/onboarding/voice", json={
+        "transcript": "Meu nome é Ana Souza",
+        "audio_metrics": {"pitch": 180.5, "volume": 0.7},
+    }).json()
+    assert user["name"] == "Ana Souza"
+
+    response = test_client.post(
+        f"/users/{user['id']}/voice-interactions", json={"audio_metrics": {"pitch": 175.0}}
+    )
+    assert response.status_code == 202
+    assert response.json() == {"accepted": True}
+
+    stats = test_client.get("/voice/ingestion/stats").json()
+    assert stats["running"]
+    assert stats["received"] >= 2
+
+    # Sem métricas, só a contagem de interações é registrada
+    response = test_client.post(f"/users/{user['id']}/voice-interactions", json={})
+    assert response.json() == {"accepted": True}
+    assert test_client.get("/voice/ingestion/stats").json()["received"] == stats["received"]
+
+    assert test_client.post(f"/users/{ObjectId()}/voice-interactions", json={}).status_code == 404
+
+def test_leaderboards_follow_xp_awards(test_client):
+    """Test that XP awards update the leaderboard ranks."""
+    ana = test_client.post("/onboarding/voice", json={"transcript": "Meu nome é Ana Souza"}).json()
+    joao = test_client.post("/onboarding/voice", json={"transcript": "Me chamo João Lima"}).json()
+
+    test_client.put(f"/users/{ana['id']}/xp", json={"xp": 100})
+    test_client.post("/users/xp/batch", json={"awards": [{"user_id": joao["id"], "xp": 250}]})
+
+    top = test_client.get("/api/leaderboards/global", params={"limit": 1}).json()
+    assert top["total"] == 2
+    assert [(item["name"], item["xp"], item["rank"]) for item in top["items"]] == [("João Lima", 250, 1)]
+
+    rank = test_client.get(f"/api/leaderboards/global/rank/{ana['id']}").json()
+    assert (rank["rank"], rank["xp"], rank["level"]) == (2, 100, 2)
+
+    assert test_client.get(f"/api/leaderboards/associations/a1/rank/{ana['id']}").status_code == 404
+    assert test_client.get("/api/leaderboards/streets/s1").status_code == 404
+
+def test_scope_stats_read_materialized_document(test_client):
+    """Test that the dashboard serves the materialized stats document."""
+    import asyncio
+
+    from main import app, get_database
+    from services.stats import rebuild_stats
+
+    db = asyncio.run(app.dependency_overrides[get_database]())
+    asyncio.run(db["users"].insert_one({"name": "Ana Souza", "level": 1, "associations": ["vila"]}))
+    assert test_client.get("/api/stats/associations/vila").status_code == 404
+
+    asyncio.run(rebuild_stats(db))
+
+    stats = test_client.get("/api/stats/associations/vila").json()
+    assert (stats["id"], stats["members"], stats["open_requests_total"]) == ("association:vila", 1, 0)
+    assert test_client.get("/api/stats/streets/s1").status_code == 404
+
+def test_events_require_valid_subscriptions(test_client):
+    """Test the SSE endpoint validation and the watcher stats."""
+    assert test_client.get("/api/events").status_code == 400
+    assert test_client.get("/api/events", params={"user_id": "invalid"}).status_code == 400
+    too_many = [str(ObjectId()) for _ in range(51)]
+    assert test_client.get("/api/events", params={"request_id": too_many}).status_code == 400
+
+    stats = test_client.get("/api/events/stats").json()
+    assert (stats["running"], stats["mode"]) == (True, "polling")
+
+def test_onboarding_response_matches_user_schema(test_client):
+    """Test that the trusted (unvalidated) response follows UserModel's schema."""
+    from models.user import UserModel
+
+    schema = UserModel.model_json_schema()
+    user = test_client.post("/onboarding/voice", json={"transcript": "Meu nome é Ana Souza"}).json()
+
+    assert set(user) <= set(schema["properties"])
+    achievement_fields = set(schema["$defs"]["UserAchievement"]["properties"])
+    assert user["achievements"] and all(set(a) <= achievement_fields for a in user["achievements"])
+    assert UserModel.model_validate(user).achievements[0].icon == "🎤"
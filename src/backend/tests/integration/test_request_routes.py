@@ -0,0 +1,148 @@
+import orjson
+from bson import ObjectId
+
+RESIDENT_ID = "6079d5c3b98f5a8e7a51a973"
+
+
+def _create_request(test_client, **overrides):
+    request = {
+        "title": "Vazamento na garagem",
+        "description": "Há um vazamento de água próximo à vaga 15",
+        "category": "maintenance",
+        "priority": "high",
+        "created_by": RESIDENT_ID,
+        **overrides,
+    }
+    response = test_client.post("/requests/", json=request)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_create_and_get_request(test_client):
+    """Test creating a request and reading it back."""
+    created = _create_request(test_client, status="resolved")
+    assert created["status"] == "pending"
+    assert created["created_by"] == RESIDENT_ID
+
+    response = test_client.get(f"/requests/{created['id']}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Vazamento na garagem"
+
+
+def test_create_request_validation(test_client):
+    """Test validation of new requests."""
+    response = test_client.post("/requests/", json={
+        "title": "Barulho",
+        "description": "Festa até tarde no bloco B",
+        "category": "noise",
+        "priority": "whenever",
+        "created_by": "not-an-id",
+    })
+    assert response.status_code == 422
+    errors = response.json()["detail"]
+    assert any("priority" in error["loc"] for error in errors)
+    assert any("created_by" in error["loc"] for error in errors)
+
+
+def test_list_requests_filters_and_pagination(test_client):
+    """Test filtering requests and walking the pages newest first."""
+    for i in range(3):
+        _create_request(test_client, title=f"Manutenção {i}")
+    _create_request(test_client, title="Barulho", category="noise", priority="low")
+
+    maintenance = test_client.get("/requests/", params={"category": "maintenance", "limit": 2}).json()
+    assert [request["title"] for request in maintenance["items"]] == ["Manutenção 2", "Manutenção 1"]
+    assert "description" not in maintenance["items"][0]
+
+    next_page = test_client.get(
+        "/requests/", params={"category": "maintenance", "limit": 2, "after": maintenance["next_cursor"]}
+    ).json()
+    assert [request["title"] for request in next_page["items"]] == ["Manutenção 0"]
+    assert next_page["next_cursor"] is None
+
+    low = test_client.get("/requests/", params={"priority": "low"}).json()["items"]
+    assert [request["title"] for request in low] == ["Barulho"]
+
+    assert test_client.get("/requests/", params={"status": "unknown"}).status_code == 422
+
+
+def test_update_request_status(test_client):
+    """Test moving a request through the board."""
+    created = _create_request(test_client)
+    assignee = str(ObjectId())
+
+    response = test_client.patch(
+        f"/requests/{created['id']}/status", json={"status": "in_progress", "assigned_to": assignee}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "in_progress"
+    assert response.json()["assigned_to"] == assignee
+
+    assigned = test_client.get("/requests/", params={"assigned_to": assignee, "status": "in_progress"}).json()
+    assert [request["id"] for request in assigned["items"]] == [created["id"]]
+
+    resolved = test_client.patch(f"/requests/{created['id']}/status", json={"status": "resolved"}).json()
+    assert resolved["resolved_at"] is not None
+
+    assert test_client.patch(f"/requests/{ObjectId()}/status", json={"status": "resolved"}).status_code == 404
+    assert test_client.patch(f"/requests/{created['id']}/status", json={"status": "done"}).status_code == 422
+
+
+def test_request_stats(test_client):
+    """Test the board dashboard counts."""
+    first = _create_request(test_client)
+    _create_request(test_client, category="noise", priority="low")
+    _create_request(test_client, category="noise")
+    test_client.patch(f"/requests/{first['id']}/status", json={"status": "resolved"})
+
+    stats = test_client.get("/requests/stats").json()
+    assert stats["total"] == 3
+    assert stats["open"] == 2
+    assert stats["by_status"]["resolved"] == 1
+    assert stats["by_status"]["cancelled"] == 0
+    assert stats["by_category"] == {"maintenance": 1, "noise": 2}
+    assert stats["by_priority"]["low"] == 1
+
+    noise = test_client.get("/requests/stats", params={"category": "noise"}).json()
+    assert noise["total"] == 2
+
+
+def test_request_comments(test_client):
+    """Test commenting on a request and paging through the comments."""
+    created = _create_request(test_client)
+    assert created["comments_count"] == 0
+
+    for text in ["Já chamamos o encanador", "Encanador chega amanhã", "Resolvido"]:
+        response = test_client.post(
+            f"/requests/{created['id']}/comments", json={"author_id": RESIDENT_ID, "text": text}
+        )
+        assert response.status_code == 201
+        assert response.json()["author_id"] == RESIDENT_ID
+
+    listed = test_client.get("/requests/").json()["items"][0]
+    assert listed["comments_count"] == 3
+    assert listed["last_comment"]["text"] == "Resolvido"
+
+    page = test_client.get(f"/requests/{created['id']}/comments", params={"limit": 2}).json()
+    assert [comment["text"] for comment in page["items"]] == ["Resolvido", "Encanador chega amanhã"]
+    rest = test_client.get(
+        f"/requests/{created['id']}/comments", params={"after": page["next_cursor"]}
+    ).json()
+    assert [comment["text"] for comment in rest["items"]] == ["Já chamamos o encanador"]
+
+    missing = test_client.post(f"/requests/{ObjectId()}/comments", json={"author_id": RESIDENT_ID, "text": "Oi"})
+    assert missing.status_code == 404
+
+
+def test_export_requests(test_client):
+    """Test exporting requests filtered by status."""
+    first = _create_request(test_client)
+    _create_request(test_client, title="Barulho", category="noise")
+    test_client.patch(f"/requests/{first['id']}/status", json={"status": "resolved"})
+
+    response = test_client.get("/requests/export", params={"status": "pending"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [orjson.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Barulho"]
+    assert rows[0]["created_by"] == RESIDENT_ID
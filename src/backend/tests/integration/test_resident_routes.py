@@ -0,0 +1,128 @@
+import orjson
+
+
+def _csv(*rows):
+    return "\n".join(rows).encode()
+
+
+def test_list_residents_pagination(test_client):
+    """Test walking the residents list with the next-page cursor header."""
+    for i in range(3):
+        response = test_client.post("/residents/", json={
+            "name": f"Morador {i}", "email": f"morador{i}@example.com", "phone": f"1198765432{i}"
+        })
+        assert response.status_code == 201
+
+    first = test_client.get("/residents/", params={"limit": 2})
+    assert [resident["name"] for resident in first.json()] == ["Morador 0", "Morador 1"]
+
+    rest = test_client.get("/residents/", params={"after": first.headers["X-Next-Cursor"]})
+    assert [resident["name"] for resident in rest.json()] == ["Morador 2"]
+    assert "X-Next-Cursor" not in rest.headers
+
+
+def test_create_resident_duplicate_email(test_client):
+    """Test that the email is unique among residents."""
+    resident = {"name": "Ana Souza", "email": "ana@example.com", "phone": "11987654321"}
+    assert test_client.post("/residents/", json=resident).status_code == 201
+    assert test_client.post("/residents/", json=resident).status_code == 409
+
+
+def test_import_residents_csv(test_client):
+    """Test a CSV import with invalid rows reported by row number."""
+    body = _csv(
+        "name,email,phone,unit_number,address",
+        'Ana Souza,ana@example.com,11987654321,101A,"Rua Principal, 10"',
+        "Bruno Lima,not-an-email,11987654322,102A,",
+        "",
+        'Carla Dias,carla@example.com,11987654323,103A,"Rua das Flores,\nfundos"',
+        "D,d@example.com,123,104A,",
+    )
+    response = test_client.post("/residents/import", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    report = response.json()
+    assert report["received"] == 4
+    assert report["inserted"] == 2
+    assert report["failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 4]
+    assert report["errors"][0]["errors"][0]["loc"] == ["email"]
+    assert {error["loc"][0] for error in report["errors"][1]["errors"]} == {"name", "phone"}
+
+    residents = {resident["email"]: resident for resident in test_client.get("/residents/").json()}
+    assert residents["carla@example.com"]["address"] == "Rua das Flores,\nfundos"
+    assert residents["ana@example.com"]["address"] == "Rua Principal, 10"
+
+
+def test_import_residents_ndjson_is_idempotent(test_client):
+    """Test that re-importing updates residents matched by email."""
+    rows = [
+        {"name": "Ana Souza", "email": "ana@example.com", "phone": "11987654321"},
+        {"name": "Bruno Lima", "email": "bruno@example.com", "phone": "11987654322"},
+    ]
+    body = b"\n".join(orjson.dumps(row) for row in rows) + b"\n{broken\n[1, 2]\n"
+
+    first = test_client.post("/residents/import?format=ndjson", content=body).json()
+    assert (first["inserted"], first["updated"], first["failed"]) == (2, 0, 2)
+    assert [error["row"] for error in first["errors"]] == [3, 4]
+
+    rows[0]["unit_number"] = "201B"
+    second = test_client.post(
+        "/residents/import",
+        content=b"\n".join(orjson.dumps(row) for row in rows),
+        headers={"Content-Type": "application/x-ndjson"},
+    ).json()
+    assert (second["inserted"], second["updated"], second["failed"]) == (0, 2, 0)
+
+    residents = test_client.get("/residents/").json()
+    assert len(residents) == 2
+    assert residents[0]["unit_number"] == "201B"
+
+
+def test_import_residents_unsupported_type(test_client):
+    """Test that uploads without a known format are rejected."""
+    response = test_client.post("/residents/import", content=b"{}", headers={"Content-Type": "application/pdf"})
+    assert response.status_code == 415
+
+
+def test_export_residents(test_client):
+    """Test streaming the residents as CSV and NDJSON."""
+    test_client.post("/residents/", json={"name": "Ana Souza", "email": "ana@example.com", "phone": "11987654321"})
+    test_client.post("/residents/", json={
+        "name": "Bruno Lima", "email": "bruno@example.com", "phone": "11987654322", "is_active": False
+    })
+
+    response = test_client.get("/residents/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="residents.csv"' in response.headers["content-disposition"]
+    lines = response.text.strip().splitlines()
+    assert lines[0].startswith("id,name,email,phone")
+    assert len(lines) == 3
+
+    active = test_client.get("/residents/export", params={"is_active": True}).text.strip().splitlines()
+    assert [orjson.loads(line)["email"] for line in active] == ["ana@example.com"]
+
+    assert test_client.get("/residents/export", params={"format": "xlsx"}).status_code == 422
+
+
+def test_reimport_keeps_fields_missing_from_the_file(test_client):
+    """Test that model defaults do not overwrite stored values on re-import."""
+    created = test_client.post("/residents/", json={
+        "name": "Ana Souza", "email": "ana@example.com", "phone": "11987654321",
+        "role": "president", "is_active": False,
+    }).json()
+    stored = test_client.get(f"/residents/{created['id']}").json()
+
+    body = _csv("name,email,phone,unit_number", "Ana Souza,ana@example.com,11987654321,301C")
+    report = test_client.post("/residents/import", content=body, headers={"Content-Type": "text/csv"}).json()
+    assert (report["inserted"], report["updated"]) == (0, 1)
+
+    resident = test_client.get(f"/residents/{created['id']}").json()
+    assert (resident["role"], resident["is_active"], resident["unit_number"]) == ("president", False, "301C")
+    assert resident["joined_date"] == stored["joined_date"]
+
+    body = _csv("name,email,phone", "Bruno Lima,bruno@example.com,11987654322")
+    test_client.post("/residents/import", content=body, headers={"Content-Type": "text/csv"})
+    bruno = next(r for r in test_client.get("/residents/").json() if r["email"] == "bruno@example.com")
+    assert (bruno["role"], bruno["is_active"]) == ("resident", True)
+    assert bruno["joined_date"]
@@ -0,0 +1,159 @@
+import json
+
+
+def _create_users(test_client, count):
+    for i in range(count):
+        response = test_client.post("/api/users/", json={"name": f"Usuário {i}", "phone": f"1199999000{i}"})
+        assert response.status_code == 200
+
+
+def test_list_users_keyset_pagination(test_client):
+    """Test walking the users list page by page with the cursor."""
+    _create_users(test_client, 5)
+
+    first_page = test_client.get("/api/users/", params={"limit": 2}).json()
+    assert len(first_page["items"]) == 2
+    assert first_page["next_cursor"] == first_page["items"][-1]["id"]
+
+    second_page = test_client.get(
+        "/api/users/", params={"limit": 2, "after": first_page["next_cursor"]}
+    ).json()
+    last_page = test_client.get(
+        "/api/users/", params={"limit": 2, "after": second_page["next_cursor"]}
+    ).json()
+
+    names = [user["name"] for page in (first_page, second_page, last_page) for user in page["items"]]
+    assert names == [f"Usuário {i}" for i in range(5)]
+    assert last_page["next_cursor"] is None
+
+
+def test_list_users_projection(test_client):
+    """Test that the list view only returns the projected fields."""
+    _create_users(test_client, 1)
+
+    user = test_client.get("/api/users/").json()["items"][0]
+    assert "id" in user
+    assert "_id" not in user
+    assert "updated_at" not in user
+
+
+def test_list_users_invalid_cursor(test_client):
+    """Test that a malformed cursor is rejected."""
+    response = test_client.get("/api/users/", params={"after": "not-an-id"})
+    assert response.status_code == 400
+
+
+def test_list_users_ndjson_stream(test_client):
+    """Test streaming the users list as NDJSON."""
+    _create_users(test_client, 3)
+
+    response = test_client.get("/api/users/", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [user["name"] for user in lines] == [f"Usuário {i}" for i in range(3)]
+
+
+def test_verify_phone_is_idempotent(test_client, monkeypatch):
+    """Test that verifying the same phone twice returns the same user."""
+    verification = {"phone": "11987654321", "code": "123456"}
+    invalidated = []
+
+    async def record_invalidation(*user_ids):
+        invalidated.extend(user_ids)
+
+    monkeypatch.setattr("routes.user_routes.invalidate_user", record_invalidation)
+
+    first = test_client.post("/api/users/verify-phone", json=verification)
+    second = test_client.post("/api/users/verify-phone", json=verification)
+    # Only the first verification inserts a user
+    assert invalidated == [first.json()["id"]]
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["id"] == second.json()["id"]
+    assert first.json()["phone"] == verification["phone"]
+    assert [achievement["id"] for achievement in first.json()["achievements"]] == ["phone_verified"]
+
+    users = test_client.get("/api/users/").json()["items"]
+    assert len(users) == 1
+
+
+def test_verify_phone_invalid_code(test_client):
+    """Test that malformed verification codes are rejected."""
+    response = test_client.post("/api/users/verify-phone", json={"phone": "11987654321", "code": "12ab"})
+    assert response.status_code == 400
+
+
+def test_create_user_returns_inserted_document(test_client):
+    """Test that the creation response matches the stored user."""
+    response = test_client.post("/api/users/", json={"name": "Maria Silva", "phone": "11987654321"})
+    assert response.status_code == 200
+    created = response.json()
+    assert created["name"] == "Maria Silva"
+    assert "_id" not in created
+
+    stored = test_client.get(f"/api/users/{created['id']}").json()
+    assert stored["id"] == created["id"]
+    assert stored["phone"] == created["phone"]
+
+
+def test_get_user_cache_invalidated_by_xp_award(test_client):
+    """Test that an XP award is visible on the next profile read."""
+    user = test_client.post("/api/users/", json={"name": "Maria Silva"}).json()
+
+    assert test_client.get(f"/api/users/{user['id']}").json().get("xp") is None
+    test_client.put(f"/users/{user['id']}/xp", json={"xp": 150})
+
+    profile = test_client.get(f"/api/users/{user['id']}").json()
+    assert profile["xp"] == 150
+    assert profile["level"] == 2
+
+
+def test_get_user_errors(test_client):
+    """Test invalid and unknown user IDs."""
+    assert test_client.get("/api/users/not-an-id").status_code == 400
+    assert test_client.get("/api/users/6079d5c3b98f5a8e7a51a973").status_code == 404
+
+
+def test_user_fields_projection(test_client):
+    """Test the fields parameter on list and detail reads."""
+    user = test_client.post("/onboarding/voice", json={"transcript": "Meu nome é Ana Souza"}).json()
+
+    summary = test_client.get("/api/users/", params={"fields": "summary"}).json()["items"][0]
+    assert set(summary) <= {"id", "name", "display_name", "level", "xp"}
+    assert summary["name"] == "Ana Souza"
+
+    # Sem cache (projeção no MongoDB) e com cache (recorte em memória)
+    uncached = test_client.get(f"/api/users/{user['id']}", params={"fields": "name,xp"}).json()
+    test_client.get(f"/api/users/{user['id']}")
+    cached = test_client.get(f"/api/users/{user['id']}", params={"fields": "name,xp"}).json()
+    assert uncached == cached == {"id": user["id"], "name": "Ana Souza", "xp": 0}
+
+    assert test_client.get("/api/users/", params={"fields": "name,password"}).status_code == 400
+
+
+def test_export_users(test_client, monkeypatch):
+    """Test exporting every user, beyond the list page size limit."""
+    _create_users(test_client, 3)
+
+    response = test_client.get("/api/users/export")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == [f"Usuário {i}" for i in range(3)]
+    assert "voice_samples" not in rows[0]
+
+    monkeypatch.setattr("utils.export.parquet_available", lambda: False)
+    assert test_client.get("/api/users/export", params={"format": "parquet"}).status_code == 501
+
+
+def test_record_activity(test_client):
+    """Test the activity heartbeat only buffers the access."""
+    from services.activity import activity_tracker
+
+    user = test_client.post("/api/users/", json={"name": "Ana Souza", "phone": "11999990000"}).json()
+    pending = activity_tracker.stats()["pending"]
+
+    assert test_client.post(f"/api/users/{user['id']}/activity").status_code == 204
+    assert activity_tracker.stats()["pending"] == pending + 1
+    assert test_client.post("/api/users/invalid/activity").status_code == 400
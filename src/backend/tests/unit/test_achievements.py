@@ -0,0 +1,46 @@
+"""Unit tests for the achievement rules."""
+from datetime import datetime
+
+import pytest
+
+from services.achievements import AchievementRule, evaluate_achievements
+
+
+def test_voice_onboarding_achievement():
+    """Test that a voice-onboarded user earns the welcome achievement."""
+    awarded_at = datetime(2024, 2, 20, 10, 0)
+    achievements = evaluate_achievements({"voice_interactions_count": 1}, awarded_at=awarded_at)
+
+    assert [achievement["id"] for achievement in achievements] == ["voice_onboarding"]
+    assert achievements[0]["name"] == "Voz Ativa!"
+    assert achievements[0]["awarded_at"] == awarded_at
+
+
+def test_owned_achievements_are_not_repeated():
+    """Test that achievements already on the user are skipped."""
+    user = {"phone": "11987654321", "achievements": [{"id": "phone_verified"}]}
+    assert evaluate_achievements(user) == []
+
+
+def test_custom_rules():
+    """Test evaluating an explicit set of rules."""
+    rule = AchievementRule(
+        id="curious",
+        name="Curioso",
+        description="Tem pelo menos três interesses",
+        icon="🔎",
+        condition=lambda user: len(user.get("interests", [])) >= 3,
+    )
+
+    assert evaluate_achievements({"interests": ["a", "b"]}, rules=[rule]) == []
+    assert evaluate_achievements({"interests": ["a", "b", "c"]}, rules=[rule])[0]["id"] == "curious"
+
+
+def test_register_duplicate_rule():
+    """Test that rule IDs must be unique."""
+    from services.achievements import register_achievement_rule
+
+    with pytest.raises(ValueError):
+        register_achievement_rule(AchievementRule(
+            id="voice_onboarding", name="x", description="x", icon="x", condition=lambda user: True
+        ))
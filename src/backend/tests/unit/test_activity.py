@@ -0,0 +1,75 @@
+"""Unit tests for the batched last-seen/streak tracker."""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from services.activity import ActivityTracker, next_streak
+
+
+def test_next_streak_transitions():
+    """Test same-day, next-day and gap transitions."""
+    day = datetime(2024, 5, 10, 9, 0)
+    assert next_streak(0, None, day) == 1
+    assert next_streak(3, day, day.replace(hour=22)) == 3
+    assert next_streak(3, day, day + timedelta(days=1)) == 4
+    assert next_streak(3, day, day + timedelta(days=2)) == 1
+    assert next_streak(0, day, day) == 1
+
+
+@pytest.mark.asyncio
+async def test_flush_coalesces_touches_into_one_update():
+    """Test that repeated touches produce one write with the latest time."""
+    db = AsyncMongoMockClient()["activity_test"]
+    yesterday = datetime(2024, 5, 9, 20, 0)
+    user_id = (await db["users"].insert_one({"last_active": yesterday, "streak_days": 2})).inserted_id
+    tracker = ActivityTracker()
+    await tracker.start(db)
+
+    try:
+        first = datetime(2024, 5, 10, 8, 0)
+        tracker.touch(user_id, first + timedelta(hours=2))
+        tracker.touch(str(user_id), first)
+        assert tracker.stats()["pending"] == 1
+    finally:
+        await tracker.stop()
+
+    user = await db["users"].find_one({"_id": user_id})
+    assert user["last_active"] == datetime(2024, 5, 10, 10, 0)
+    assert user["streak_days"] == 3
+    assert tracker.stats() == {"running": False, "pending": 0, "flushes": 1, "updated": 1}
+
+
+@pytest.mark.asyncio
+async def test_flush_never_moves_last_active_backwards():
+    """Test that an older pending time doesn't overwrite a newer stored one."""
+    db = AsyncMongoMockClient()["activity_test"]
+    latest = datetime(2024, 5, 10, 18, 0)
+    user_id = (await db["users"].insert_one({"last_active": latest, "streak_days": 5})).inserted_id
+    tracker = ActivityTracker()
+    tracker.db = db
+
+    tracker.touch(user_id, latest - timedelta(hours=3))
+    tracker.touch(ObjectId(), latest)  # Usuário inexistente é ignorado
+    assert await tracker.flush() == 1
+
+    user = await db["users"].find_one({"_id": user_id})
+    assert user["last_active"] == latest
+    assert user["streak_days"] == 5
+
+
+@pytest.mark.asyncio
+async def test_streak_resets_after_a_gap():
+    """Test that a missed day restarts the streak at 1."""
+    db = AsyncMongoMockClient()["activity_test"]
+    user_id = (await db["users"].insert_one(
+        {"last_active": datetime(2024, 5, 1, 12, 0), "streak_days": 7}
+    )).inserted_id
+    tracker = ActivityTracker()
+    tracker.db = db
+
+    tracker.touch(user_id, datetime(2024, 5, 4, 12, 0))
+    await tracker.flush()
+
+    assert (await db["users"].find_one({"_id": user_id}))["streak_days"] == 1
@@ -0,0 +1,123 @@
+"""Unit tests for the background audio-metrics ingestion."""
+import asyncio
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from services.audio_metrics import (
+    AUDIO_METRICS_COLLECTION,
+    AudioMetricsIngestor,
+    ensure_audio_metrics_collection,
+)
+
+
+@pytest.mark.asyncio
+async def test_metrics_are_written_in_batches():
+    """Test that queued metrics are grouped into insert_many batches."""
+    db = AsyncMongoMockClient()["audio_test"]
+    await ensure_audio_metrics_collection(db)
+    ingestor = AudioMetricsIngestor(batch_size=3, flush_interval=0.05)
+    await ingestor.start(db)
+
+    user_id = ObjectId()
+    try:
+        for i in range(7):
+            assert await ingestor.submit(user_id, {"pitch": 100 + i}, source="test")
+        await asyncio.sleep(0.2)
+
+        assert ingestor.stats()["inserted"] == 7
+    finally:
+        await ingestor.stop()
+
+    documents = await db[AUDIO_METRICS_COLLECTION].find().to_list(None)
+    assert [document["metrics"]["pitch"] for document in documents] == list(range(100, 107))
+    assert documents[0]["meta"] == {"user_id": user_id, "source": "test"}
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_queue_and_coalesces_interactions():
+    """Test that shutdown writes pending metrics and one $inc per user."""
+    db = AsyncMongoMockClient()["audio_test"]
+    user_id = (await db["users"].insert_one({"name": "Ana", "voice_interactions_count": 1})).inserted_id
+    ingestor = AudioMetricsIngestor(flush_interval=60)
+    await ingestor.start(db)
+
+    try:
+        for _ in range(3):
+            await ingestor.submit(user_id, {"volume": 0.5}, source="interaction", count_interaction=True)
+    finally:
+        await ingestor.stop()
+
+    assert await db[AUDIO_METRICS_COLLECTION].count_documents({}) == 3
+    user = await db["users"].find_one({"_id": user_id})
+    assert user["voice_interactions_count"] == 4
+    assert not ingestor.running
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_metrics_but_keeps_interactions():
+    """Test the backpressure: a full queue drops metrics after a short wait."""
+    db = AsyncMongoMockClient()["audio_test"]
+    user_id = (await db["users"].insert_one({"name": "Ana", "voice_interactions_count": 0})).inserted_id
+    ingestor = AudioMetricsIngestor(maxsize=2, batch_size=1, flush_interval=60, put_timeout=0.01)
+
+    # A gravação fica presa no primeiro lote até `release` ser sinalizado
+    release = asyncio.Event()
+    flush = ingestor._flush
+
+    async def blocked_flush(batch):
+        await release.wait()
+        await flush(batch)
+
+    ingestor._flush = blocked_flush
+    await ingestor.start(db)
+    try:
+        results = [
+            await ingestor.submit(user_id, {"pitch": i}, source="test", count_interaction=True)
+            for i in range(4)
+        ]
+        # Um item em gravação, dois na fila e o quarto descartado
+        assert results == [True, True, True, False]
+        assert ingestor.stats()["dropped"] == 1
+    finally:
+        release.set()
+        await ingestor.stop()
+
+    assert await db[AUDIO_METRICS_COLLECTION].count_documents({}) == 3
+    user = await db["users"].find_one({"_id": user_id})
+    assert user["voice_interactions_count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_submit_without_running_ingestor_is_dropped():
+    """Test that metrics are not queued before the lifespan starts the worker."""
+    ingestor = AudioMetricsIngestor()
+    assert not await ingestor.submit(ObjectId(), {"pitch": 1}, source="test")
+    assert ingestor.stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_interactions_without_metrics_are_counted_only():
+    """Test that bare interactions write no metrics and are flushed after stop()."""
+    db = AsyncMongoMockClient()["audio_test"]
+    user_id = (await db["users"].insert_one({"name": "Ana", "voice_interactions_count": 0})).inserted_id
+    ingestor = AudioMetricsIngestor(flush_interval=0.05)
+    await ingestor.start(db)
+
+    try:
+        ingestor.record_interaction(user_id)
+        await asyncio.sleep(0.2)
+        user = await db["users"].find_one({"_id": user_id})
+        assert user["voice_interactions_count"] == 1
+    finally:
+        await ingestor.stop()
+
+    # Contada com a tarefa parada: gravada no próximo stop()
+    ingestor.record_interaction(user_id)
+    await ingestor.stop()
+
+    user = await db["users"].find_one({"_id": user_id})
+    assert user["voice_interactions_count"] == 2
+    assert await db[AUDIO_METRICS_COLLECTION].count_documents({}) == 0
+    assert ingestor.stats()["received"] == 0
@@ -0,0 +1,143 @@
+"""Unit tests for the in-process cache."""
+import asyncio
+
+import pytest
+
+from services.cache import AsyncLRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = AsyncLRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_expiration():
+    """Test that entries expire after the TTL."""
+    clock = FakeClock()
+    cache = AsyncLRUCache(maxsize=10, ttl=30, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 29
+    assert cache.get("a") == 1
+    clock.now = 30
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_peek_does_not_count_hits_or_misses():
+    """Test that peek reads the cache without touching the statistics."""
+    cache = AsyncLRUCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.peek("a") == 1
+    assert cache.peek("b", "ausente") == "ausente"
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced():
+    """Test that concurrent loads of the same key hit the loader once."""
+    cache = AsyncLRUCache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"name": "Maria"}
+
+    results = await asyncio.gather(*(cache.get_or_load("user", loader) for _ in range(10)))
+    assert calls == 1
+    assert all(result == {"name": "Maria"} for result in results)
+    assert await cache.get_or_load("user", loader) == {"name": "Maria"}
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_overwritten():
+    """Test that a load started before a write does not repopulate the cache."""
+    cache = AsyncLRUCache()
+    started = asyncio.Event()
+
+    async def slow_loader():
+        started.set()
+        await asyncio.sleep(0.01)
+        return "stale"
+
+    task = asyncio.create_task(cache.get_or_load("user", slow_loader))
+    await started.wait()
+    cache.invalidate("user")
+    assert await task == "stale"
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_missing_values_are_not_cached():
+    """Test that None results are not stored."""
+    cache = AsyncLRUCache()
+
+    async def loader():
+        return None
+
+    assert await cache.get_or_load("missing", loader) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_loader_errors_propagate():
+    """Test that loader failures reach the caller and are not cached."""
+    cache = AsyncLRUCache()
+
+    async def loader():
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("user", loader)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_first_caller_does_not_cancel_followers():
+    """Test that a cancelled leader leaves the shared load running for the others."""
+    cache = AsyncLRUCache()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await release.wait()
+        return {"name": "Maria"}
+
+    leader = asyncio.create_task(cache.get_or_load("user", loader))
+    await started.wait()
+    follower = asyncio.create_task(cache.get_or_load("user", loader))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    release.set()
+
+    assert await follower == {"name": "Maria"}
+    assert calls == 1
+    assert cache.get("user") == {"name": "Maria"}
@@ -0,0 +1,60 @@
+"""Unit tests for the bucketed request comment store."""
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from services import comments
+from services.comments import COMMENTS_COLLECTION, add_comment, list_comments
+
+
+async def _db_with_request():
+    db = AsyncMongoMockClient()["comments_test"]
+    request_id = (await db["requests"].insert_one({"title": "Portão quebrado", "comments_count": 0})).inserted_id
+    return db, request_id
+
+
+@pytest.mark.asyncio
+async def test_comments_fill_fixed_size_buckets(monkeypatch):
+    """Test that comments roll over into a new bucket when one is full."""
+    db, request_id = await _db_with_request()
+    monkeypatch.setattr(comments, "COMMENT_BUCKET_SIZE", 2)
+    author = ObjectId()
+
+    for i in range(5):
+        await add_comment(db, request_id, author, f"Comentário {i}")
+
+    buckets = await db[COMMENTS_COLLECTION].find({"request_id": request_id}).to_list(None)
+    assert sorted(bucket["count"] for bucket in buckets) == [1, 2, 2]
+
+    request = await db["requests"].find_one({"_id": request_id})
+    assert request["comments_count"] == 5
+    assert request["last_comment"]["text"] == "Comentário 4"
+    assert "comments" not in request
+
+
+@pytest.mark.asyncio
+async def test_list_comments_pages_across_buckets(monkeypatch):
+    """Test that pages are newest first and continue across bucket boundaries."""
+    db, request_id = await _db_with_request()
+    monkeypatch.setattr(comments, "COMMENT_BUCKET_SIZE", 2)
+    for i in range(5):
+        await add_comment(db, request_id, ObjectId(), f"Comentário {i}")
+
+    texts, after = [], None
+    while True:
+        page = await list_comments(db, request_id, after=after and ObjectId(after), limit=2)
+        texts.extend(comment["text"] for comment in page["items"])
+        after = page["next_cursor"]
+        if after is None:
+            break
+
+    assert texts == [f"Comentário {i}" for i in reversed(range(5))]
+
+
+@pytest.mark.asyncio
+async def test_add_comment_to_missing_request():
+    """Test that comments on unknown requests are not stored."""
+    db, _ = await _db_with_request()
+
+    assert await add_comment(db, ObjectId(), ObjectId(), "Olá") is None
+    assert await db[COMMENTS_COLLECTION].count_documents({}) == 0
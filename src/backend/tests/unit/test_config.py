@@ -57,4 +57,40 @@ def test_mongodb_url_validation():
     finally:
         # Restore original env variables
         os.environ.clear()
-        os.environ.update(original_env) 
\ No newline at end of file
+        os.environ.update(original_env) 
+
+def test_production_server_profile():
+    """Test the production uvicorn options and their environment overrides."""
+    from config.server import ServerSettings
+
+    env = {"WEB_CONCURRENCY": "6", "SERVER_KEEP_ALIVE": "75", "SERVER_LIMIT_CONCURRENCY": "2000"}
+    with patch.dict(os.environ, env), patch("config.server.importlib.util.find_spec", return_value=object()):
+        options = ServerSettings.for_profile("production").uvicorn_options()
+
+    assert options["workers"] == 6
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+    assert options["reload"] is False
+    assert options["host"] == "0.0.0.0"
+    assert options["timeout_keep_alive"] == 75
+    assert options["timeout_graceful_shutdown"] == 30
+    assert options["limit_concurrency"] == 2000
+    assert "limit_max_requests" not in options
+
+
+def test_development_server_profile_and_fallbacks():
+    """Test the reload profile and the fallback when uvloop/httptools are missing."""
+    from config.server import ServerSettings, default_workers
+
+    development = ServerSettings.for_profile("development", port=9000).uvicorn_options()
+    assert development["reload"] is True and "workers" not in development
+    assert (development["host"], development["port"]) == ("127.0.0.1", 9000)
+
+    with patch.dict(os.environ, {"WEB_CONCURRENCY": ""}), patch(
+        "config.server.importlib.util.find_spec", return_value=None
+    ):
+        production = ServerSettings.for_profile("production")
+    assert (production.loop, production.http) == ("asyncio", "h11")
+    assert production.workers == default_workers() >= 1
+
+    with pytest.raises(ValueError):
+        ServerSettings.for_profile("staging")
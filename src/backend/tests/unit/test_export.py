@@ -0,0 +1,68 @@
+"""Unit tests for the streamed collection exports."""
+import csv
+import io
+from datetime import datetime
+
+import orjson
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from models.user import UserListItem
+from utils.export import stream_export
+from utils.mongo import projection_for
+
+
+async def _users_cursor(count):
+    collection = AsyncMongoMockClient()["export_test"]["users"]
+    for document in [
+        {"name": f"Usuário {i}", "xp": i * 10, "level": 1, "created_at": datetime(2024, 1, i + 1),
+         "voice_samples": ["não exportado"]}
+        for i in range(count)
+    ]:
+        await collection.insert_one(document)
+    return collection.find({}, projection_for(UserListItem), batch_size=2).sort("_id", 1)
+
+
+async def _collect(cursor, export_format, batch_size=2):
+    return [chunk async for chunk in stream_export(cursor, UserListItem, export_format, batch_size)]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_streams_one_chunk_per_batch():
+    """Test that each cursor batch becomes one chunk of NDJSON lines."""
+    chunks = await _collect(await _users_cursor(5), "ndjson")
+    assert len(chunks) == 3
+
+    rows = [orjson.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [row["name"] for row in rows] == [f"Usuário {i}" for i in range(5)]
+    assert set(rows[0]) == set(UserListItem.model_fields)
+    assert rows[0]["id"]
+
+
+@pytest.mark.asyncio
+async def test_csv_export_writes_header_once():
+    """Test that CSV exports have a single header and ISO timestamps."""
+    chunks = await _collect(await _users_cursor(3), "csv")
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+
+    assert [row["xp"] for row in rows] == ["0", "10", "20"]
+    assert rows[0]["created_at"] == "2024-01-01T00:00:00"
+    assert rows[0]["phone"] == ""
+
+
+@pytest.mark.asyncio
+async def test_csv_export_of_empty_collection_has_header():
+    """Test that an empty export still carries the column names."""
+    chunks = await _collect(await _users_cursor(0), "csv")
+    assert b"".join(chunks).decode().strip() == ",".join(UserListItem.model_fields)
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_round_trip():
+    """Test that Parquet exports are readable with the model's column types."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    chunks = await _collect(await _users_cursor(5), "parquet")
+
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.num_rows == 5
+    assert table.column("xp").to_pylist() == [0, 10, 20, 30, 40]
@@ -0,0 +1,59 @@
+"""Unit tests for the index registry."""
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import DuplicateKeyError
+
+from config.indexes import INDEXES, ensure_indexes, index_report
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_is_idempotent():
+    """Test that applying the registry twice leaves nothing missing."""
+    db = AsyncMongoMockClient()["indexes_test"]
+
+    await ensure_indexes(db)
+    await ensure_indexes(db)
+
+    report = await index_report(db)
+    assert set(report) == set(INDEXES)
+    assert all(not result["missing"] for result in report.values())
+    assert all(not result["undeclared"] for result in report.values())
+
+
+@pytest.mark.asyncio
+async def test_report_lists_missing_indexes():
+    """Test that indexes not yet created are reported as missing."""
+    db = AsyncMongoMockClient()["indexes_test"]
+
+    report = await index_report(db)
+    assert "phone_unique" in report["users"]["missing"]
+
+
+@pytest.mark.asyncio
+async def test_phone_index_is_unique_and_sparse():
+    """Test that users without a phone do not collide on the unique index."""
+    db = AsyncMongoMockClient()["indexes_test"]
+    await ensure_indexes(db)
+
+    await db["users"].insert_one({"name": "Sem telefone"})
+    await db["users"].insert_one({"name": "Também sem telefone"})
+    await db["users"].insert_one({"name": "Maria", "phone": "11987654321"})
+    with pytest.raises(DuplicateKeyError):
+        await db["users"].insert_one({"name": "Outra Maria", "phone": "11987654321"})
+
+
+@pytest.mark.asyncio
+async def test_legacy_null_phones_do_not_block_the_unique_index():
+    """Test that users stored with phone: null are migrated before indexing."""
+    db = AsyncMongoMockClient()["indexes_test"]
+    await db["users"].insert_one({"name": "Legado 1", "phone": None})
+    await db["users"].insert_one({"name": "Legado 2", "phone": None})
+    await db["users"].insert_one({"name": "Maria", "phone": "11987654321"})
+
+    created = await ensure_indexes(db)
+
+    assert "phone_unique" in created["users"]
+    assert await db["users"].count_documents({"phone": {"$exists": True}}) == 1
+    await db["users"].insert_one({"name": "Novo, sem telefone"})
+    with pytest.raises(DuplicateKeyError):
+        await db["users"].insert_one({"name": "Outra Maria", "phone": "11987654321"})
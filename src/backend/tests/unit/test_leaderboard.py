@@ -0,0 +1,65 @@
+"""Unit tests for the incrementally maintained leaderboards."""
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from services.cache_backends import MemoryCacheBackend
+from services.leaderboard import (
+    GLOBAL_SCOPE,
+    Leaderboards,
+    RankedSet,
+    association_scope,
+    community_scope,
+)
+
+
+def test_ranked_set_orders_by_score_then_member():
+    """Test ranks, ties and score updates."""
+    ranked = RankedSet()
+    ranked.update("b", 50)
+    ranked.update("a", 50)
+    ranked.update("c", 80)
+
+    assert ranked.top(3) == [("c", 80), ("a", 50), ("b", 50)]
+    assert ranked.rank("b") == 2
+
+    ranked.update("b", 100)
+    assert ranked.rank("b") == 0
+    ranked.remove("c")
+    assert ranked.top(5) == [("b", 100), ("a", 50)]
+    assert ranked.rank("c") is None
+
+
+def test_scoped_boards_follow_membership_changes():
+    """Test that users leave boards of associations they no longer belong to."""
+    boards = Leaderboards()
+    boards._apply({"_id": "u1", "name": "Ana", "xp": 30, "associations": ["a1"], "communities": ["c1"]})
+    boards._apply({"_id": "u2", "name": "Bruno", "xp": 10, "associations": ["a1"]})
+
+    assert [item["name"] for item in boards.top(association_scope("a1"))["items"]] == ["Ana", "Bruno"]
+    assert boards.rank(community_scope("c1"), "u1")["rank"] == 1
+
+    boards._apply({"_id": "u1", "name": "Ana", "xp": 40, "associations": []})
+    assert boards.top(association_scope("a1"))["total"] == 1
+    assert boards.rank(community_scope("c1"), "u1") is None
+    assert boards.rank(GLOBAL_SCOPE, "u1") == {
+        "scope": GLOBAL_SCOPE, "total": 2, "rank": 1, "id": "u1", "name": "Ana", "level": 1, "xp": 40,
+    }
+
+
+@pytest.mark.asyncio
+async def test_rebuild_and_cross_worker_updates():
+    """Test loading from MongoDB and applying updates published by another worker."""
+    db = AsyncMongoMockClient()["leaderboard_test"]
+    first = (await db["users"].insert_one({"name": "Ana", "xp": 300, "level": 3})).inserted_id
+    second = (await db["users"].insert_one({"name": "Bruno", "xp": 100, "level": 2})).inserted_id
+
+    backend = MemoryCacheBackend()
+    worker_a, worker_b = Leaderboards(), Leaderboards()
+    for boards in (worker_a, worker_b):
+        assert await boards.rebuild(db) == 2
+        await boards.attach(backend)
+
+    await worker_a.record([{"_id": second, "name": "Bruno", "xp": 500, "level": 4}])
+
+    assert worker_b.rank(GLOBAL_SCOPE, str(second))["rank"] == 1
+    assert worker_b.rank(GLOBAL_SCOPE, str(first))["rank"] == 2
@@ -0,0 +1,45 @@
+"""Unit tests for the level curve."""
+import pytest
+
+from services.level_curve import LevelCurve
+
+
+def _legacy_level_up(total_xp):
+    """Original level-up loop used by the XP endpoint."""
+    level, xp, next_level_xp = 1, total_xp, 100
+    while xp >= next_level_xp:
+        level += 1
+        xp -= next_level_xp
+        next_level_xp = int(next_level_xp * 1.1)
+    return level, xp, next_level_xp
+
+
+@pytest.mark.parametrize("total_xp", [0, 1, 99, 100, 209, 210, 331, 1000, 12345, 98765])
+def test_progress_matches_legacy_loop(total_xp):
+    """Test that the precomputed table reproduces the original loop."""
+    curve = LevelCurve(max_level=200)
+    assert curve.progress(total_xp) == _legacy_level_up(total_xp)
+
+
+def test_level_is_capped_at_max_level():
+    """Test that huge grants stop at the configured maximum level."""
+    curve = LevelCurve(max_level=10)
+    level, xp, _ = curve.progress(10**9)
+    assert level == 10
+    assert xp == 10**9 - curve.thresholds[-1]
+
+
+def test_thresholds_are_cumulative():
+    """Test the cumulative XP thresholds."""
+    curve = LevelCurve(max_level=4)
+    assert curve.thresholds == [100, 210, 331]
+    assert curve.level_for(99) == 1
+    assert curve.level_for(100) == 2
+    assert curve.level_for(331) == 4
+
+
+def test_invalid_max_level():
+    """Test that the curve needs at least one level."""
+    with pytest.raises(ValueError):
+        LevelCurve(max_level=0)
+
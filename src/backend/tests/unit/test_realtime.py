@@ -0,0 +1,157 @@
+"""Unit tests for the realtime change fan-out."""
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import OperationFailure
+
+from routes.realtime_routes import event_stream
+from services.realtime import (
+    CHANGE_STREAMS_UNSUPPORTED,
+    WATCHED_FIELDS,
+    RealtimeHub,
+    changes_filter,
+    user_topic,
+)
+
+
+def _user(user_id, xp, level=1):
+    return {"_id": user_id, "xp": xp, "level": level, "achievements": []}
+
+
+@pytest.mark.asyncio
+async def test_slow_client_only_loses_its_own_oldest_events():
+    """Test that a full queue drops old events without affecting other clients."""
+    hub = RealtimeHub(queue_size=2)
+    user_id = ObjectId()
+    fast = hub.subscribe([user_topic(user_id)])
+    slow = hub.subscribe([user_topic(user_id)])
+
+    received = []
+    for xp in range(1, 6):
+        hub.dispatch("users", _user(user_id, xp))
+        received.append((await fast.get())["xp"])
+
+    assert received == [1, 2, 3, 4, 5]
+    assert [(await slow.get())["xp"] for _ in range(2)] == [4, 5]
+    assert (fast.dropped, slow.dropped) == (0, 3)
+
+
+@pytest.mark.asyncio
+async def test_dispatch_skips_unchanged_state_and_flags_level_up():
+    """Test deduplication against the last sent state and level-up detection."""
+    hub = RealtimeHub()
+    user_id = ObjectId()
+    subscription = hub.subscribe([user_topic(user_id)])
+
+    hub.send_current(subscription, "users", _user(user_id, 90))
+    assert (await subscription.get())["level_up"] is False
+
+    hub.dispatch("users", {**_user(user_id, 90), "last_active": datetime.now()})
+    hub.dispatch("users", _user(ObjectId(), 500, level=3))  # Sem inscritos
+    hub.dispatch("users", _user(user_id, 120, level=2))
+
+    event = await subscription.get()
+    assert (event["xp"], event["level"], event["level_up"]) == (120, 2, True)
+    assert hub.stats()["published"] == 1
+
+    hub.unsubscribe(subscription)
+    assert hub.stats()["topics"] == 0
+
+
+@pytest.mark.asyncio
+async def test_polling_fallback_picks_up_updates():
+    """Test the updated_at polling used when change streams are unavailable."""
+    db = AsyncMongoMockClient()["realtime_test"]
+    user_id = (await db["users"].insert_one({**_user(None, 0), "_id": ObjectId()})).inserted_id
+    hub = RealtimeHub(poll_interval=0.05)
+    subscription = hub.subscribe([user_topic(user_id)])
+    await hub.start(db, use_change_stream=False)
+
+    try:
+        await asyncio.sleep(0.01)
+        await db["users"].update_one(
+            {"_id": user_id}, {"$set": {"xp": 150, "level": 2, "updated_at": datetime.now()}}
+        )
+        event = await asyncio.wait_for(subscription.get(), 1)
+    finally:
+        await hub.stop()
+
+    assert (event["type"], event["id"], event["xp"]) == ("user", str(user_id), 150)
+    assert hub.stats()["mode"] == "polling"
+
+
+@pytest.mark.asyncio
+async def test_changes_filter_skips_unwatched_updates():
+    """Test that only updates touching watched fields pass the change stream $match."""
+    events = AsyncMongoMockClient()["realtime_test"]["events"]
+    await events.insert_many([
+        {"n": 1, "ns": {"coll": "users"}, "operationType": "update",
+         "updateDescription": {"updatedFields": {"last_active": 1, "streak_days": 2}}},
+        {"n": 2, "ns": {"coll": "users"}, "operationType": "update",
+         "updateDescription": {"updatedFields": {"xp": 10, "updated_at": 2}}},
+        {"n": 3, "ns": {"coll": "users"}, "operationType": "update",
+         "updateDescription": {"updatedFields": {"achievements.3": {}}}},
+        {"n": 4, "ns": {"coll": "users"}, "operationType": "replace"},
+        {"n": 5, "ns": {"coll": "requests"}, "operationType": "update",
+         "updateDescription": {"updatedFields": {"xp": 10}}},
+        {"n": 6, "ns": {"coll": "requests"}, "operationType": "update",
+         "updateDescription": {"updatedFields": {"comments_count": 1}}},
+    ])
+    match = {"$or": [changes_filter(collection) for collection in WATCHED_FIELDS]}
+    assert [event["n"] async for event in events.aggregate([{"$match": match}])] == [2, 3, 4, 6]
+
+
+class _FailingWatchDatabase:
+    """Database whose change streams fail with the given error codes, in order."""
+
+    def __init__(self, *codes):
+        self.codes = list(codes)
+        self.attempts = 0
+
+    def watch(self, *args, **kwargs):
+        self.attempts += 1
+        raise OperationFailure("change stream failed", code=self.codes.pop(0))
+
+
+@pytest.mark.asyncio
+async def test_watch_retries_before_falling_back_to_polling():
+    """Test that transient failures are retried and only unsupported change streams poll."""
+    db = _FailingWatchDatabase(11600, 91, CHANGE_STREAMS_UNSUPPORTED)
+    hub = RealtimeHub(poll_interval=60, retry_delay=0.001)
+    await hub.start(db)
+    try:
+        for _ in range(100):
+            if hub.mode == "polling":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await hub.stop()
+
+    assert (db.attempts, hub.mode) == (3, "polling")
+
+
+@pytest.mark.asyncio
+async def test_event_stream_sends_heartbeats_and_unsubscribes():
+    """Test the SSE framing, keep-alive comments and cleanup on disconnect."""
+    from services.realtime import realtime_hub
+
+    user_id = ObjectId()
+    subscription = realtime_hub.subscribe([user_topic(user_id)])
+    stream = event_stream(subscription, heartbeat=0.01)
+
+    assert await stream.__anext__() == b": keep-alive\n\n"
+    realtime_hub.dispatch("users", _user(user_id, 10))
+    chunk = await stream.__anext__()
+    event_line, data_line, *_ = chunk.decode().split("\n")
+    assert event_line == "event: user"
+    assert json.loads(data_line[len("data: "):]) == {
+        "type": "user", "id": str(user_id), "xp": 10, "level": 1, "achievements": [], "level_up": False,
+    }
+    assert chunk.endswith(b"\n\n")
+
+    await stream.aclose()
+    assert user_topic(user_id) not in realtime_hub._subscriptions
@@ -0,0 +1,78 @@
+"""Unit tests for the JSON response encoding."""
+from datetime import datetime
+
+import orjson
+import pytest
+from bson import Decimal128, ObjectId
+
+from models.request import RequestModel
+from models.user import UserRole
+from utils.responses import MongoJSONResponse, dumps
+
+
+def test_encodes_mongo_documents():
+    """Test encoding ObjectId, datetime and nested achievements."""
+    user_id = ObjectId()
+    document = {
+        "_id": user_id,
+        "role": UserRole.RESIDENT,
+        "created_at": datetime(2024, 2, 20, 10, 0, 0, 123000),
+        "achievements": [{"id": "voice_onboarding", "unlocked_at": datetime(2024, 2, 20, 10, 0)}],
+        "balance": Decimal128("10.50"),
+    }
+
+    assert orjson.loads(dumps(document)) == {
+        "_id": str(user_id),
+        "role": "resident",
+        "created_at": "2024-02-20T10:00:00.123000",
+        "achievements": [{"id": "voice_onboarding", "unlocked_at": "2024-02-20T10:00:00"}],
+        "balance": "10.50",
+    }
+
+
+def test_encodes_pydantic_models():
+    """Test that Pydantic models (and PydanticObjectId) are serialized."""
+    created_by = ObjectId()
+    request = RequestModel(
+        title="Vazamento",
+        description="Há um vazamento na garagem",
+        category="maintenance",
+        created_by=created_by,
+    )
+    assert orjson.loads(dumps({"request": request}))["request"]["created_by"] == str(created_by)
+
+
+def test_unknown_types_raise():
+    """Test that unsupported values are reported."""
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_response_render():
+    """Test the response class body and media type."""
+    response = MongoJSONResponse({"id": ObjectId("6079d5c3b98f5a8e7a51a973")})
+    assert response.body == b'{"id":"6079d5c3b98f5a8e7a51a973"}'
+    assert response.media_type == "application/json"
+
+
+def test_trusted_response_projects_declared_fields():
+    """Test that trusted responses follow the model without validating it."""
+    from models.user import UserModel
+    from utils.responses import trusted_response
+
+    document = {
+        "id": "6079d5c3b98f5a8e7a51a973",
+        "name": "Maria Silva",
+        "email": "stored-without-validation",
+        "xp": 250,
+        "level": 3,
+        "internal_flag": True,
+    }
+    content = orjson.loads(trusted_response(UserModel, document).body)
+
+    assert set(content) == set(UserModel.model_fields)
+    assert content["email"] == "stored-without-validation"
+    assert content["xp"] == 250
+    assert content["achievements"] == []
+    assert content["role"] == "resident"
+    assert "internal_flag" not in content
@@ -0,0 +1,165 @@
+"""Unit tests for the shared (L2) cache tier."""
+import asyncio
+
+import pytest
+
+from services.cache import AsyncLRUCache, TieredCache
+from services.cache_backends import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    create_cache_backend,
+)
+
+_sleep = asyncio.sleep
+
+
+async def _no_sleep(delay):
+    await _sleep(0)
+
+
+async def _worker(backend):
+    """A cache as seen by one uvicorn worker."""
+    cache = TieredCache("users", AsyncLRUCache(maxsize=10, ttl=60), ttl=60)
+    await cache.attach(backend)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_second_worker_reads_from_shared_tier():
+    """Test that a value loaded by one worker is reused by another."""
+    backend = MemoryCacheBackend()
+    worker_a, worker_b = await _worker(backend), await _worker(backend)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return {"name": "Maria", "level": 2}
+
+    assert await worker_a.get_or_load("u1", loader) == {"name": "Maria", "level": 2}
+    assert await worker_b.get_or_load("u1", loader) == {"name": "Maria", "level": 2}
+    assert calls == 1
+    assert worker_b.stats()["shared_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_every_worker():
+    """Test that invalidating on one worker clears the others' local copies."""
+    backend = MemoryCacheBackend()
+    worker_a, worker_b = await _worker(backend), await _worker(backend)
+    level = 1
+
+    async def loader():
+        return {"level": level}
+
+    await worker_a.get_or_load("u1", loader)
+    await worker_b.get_or_load("u1", loader)
+
+    level = 2
+    await worker_a.invalidate("u1")
+
+    assert len(worker_b.local) == 0
+    assert await worker_b.get_or_load("u1", loader) == {"level": 2}
+
+
+@pytest.mark.asyncio
+async def test_without_backend_only_local_tier_is_used():
+    """Test that the tiered cache works without a shared backend."""
+    cache = TieredCache("users", AsyncLRUCache())
+
+    async def loader():
+        return {"name": "Maria"}
+
+    assert await cache.get_or_load("u1", loader) == {"name": "Maria"}
+    await cache.invalidate("u1")
+    assert len(cache.local) == 0
+
+
+def test_create_cache_backend():
+    """Test backend selection from the configured URL."""
+    assert create_cache_backend(None) is None
+    assert isinstance(create_cache_backend("memory://"), MemoryCacheBackend)
+    with pytest.raises(ValueError):
+        create_cache_backend("memcached://localhost")
+
+
+class _FakePubSub:
+    """Pub/sub whose first connection drops after one message."""
+
+    def __init__(self, messages, fail):
+        self.channels = []
+        self._messages = messages
+        self._fail = fail
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.channels.extend(channels)
+
+    async def listen(self):
+        for message in self._messages:
+            yield message
+        if self._fail:
+            raise ConnectionError("Connection reset by peer")
+        await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeRedis:
+    def __init__(self, connections):
+        self.connections = connections
+        self.opened = []
+
+    def pubsub(self):
+        self.opened.append(self.connections.pop(0))
+        return self.opened[-1]
+
+    async def close(self):
+        pass
+
+
+def _message(channel, data):
+    return {"type": "message", "channel": channel.encode(), "data": data.encode()}
+
+
+@pytest.mark.asyncio
+async def test_redis_listener_resubscribes_after_connection_loss(monkeypatch):
+    """Test that a dropped pub/sub connection is reopened and resubscribed."""
+    monkeypatch.setattr("services.cache_backends.asyncio.sleep", _no_sleep)
+    client = _FakeRedis([
+        _FakePubSub([_message("a", "1")], fail=True),
+        _FakePubSub([_message("a", "2"), _message("b", "3")], fail=False),
+    ])
+    backend = RedisCacheBackend("redis://localhost", client=client)
+    received, reconnects = [], []
+    backend.on_reconnect(lambda: reconnects.append(True))
+
+    await backend.subscribe("a", received.append)
+    await backend.subscribe("b", received.append)
+    for _ in range(20):
+        await _no_sleep(0)
+        if len(received) == 3:
+            break
+    await backend.close()
+
+    first, second = client.opened
+    assert received == ["1", "2", "3"]
+    assert first.closed and second.channels == ["a", "b"]
+    assert reconnects == [True]
+
+
+@pytest.mark.asyncio
+async def test_reconnect_clears_local_tier():
+    """Test that a tiered cache drops its L1 when invalidations may have been lost."""
+    client = _FakeRedis([_FakePubSub([], fail=False)])
+    backend = RedisCacheBackend("redis://localhost", client=client)
+    cache = TieredCache("users", AsyncLRUCache())
+    await cache.attach(backend)
+    cache.local.set("u1", {"level": 1})
+
+    for callback in backend._reconnect_handlers:
+        callback()
+    await backend.close()
+
+    assert len(cache.local) == 0
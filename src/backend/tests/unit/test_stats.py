@@ -0,0 +1,115 @@
+"""Unit tests for the materialized association/community statistics."""
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from services.stats import (
+    StatsRefresher,
+    get_scope_stats,
+    rebuild_stats,
+    refresh_stats,
+)
+
+NOW = datetime(2024, 5, 10, 12, 0)
+
+
+async def _seed(db):
+    ana = (await db["users"].insert_one({
+        "name": "Ana", "level": 2, "associations": ["vila"], "communities": ["horta"],
+        "last_active": NOW - timedelta(days=1), "updated_at": NOW - timedelta(days=30),
+    })).inserted_id
+    bruno = (await db["users"].insert_one({
+        "name": "Bruno", "level": 4, "associations": ["vila"],
+        "last_active": NOW - timedelta(days=20), "updated_at": NOW - timedelta(days=30),
+    })).inserted_id
+    for category, status, created_by in [
+        ("maintenance", "pending", ana),
+        ("maintenance", "in_progress", bruno),
+        ("noise", "pending", bruno),
+        ("noise", "resolved", ana),
+    ]:
+        await db["requests"].insert_one({
+            "category": category, "status": status, "created_by": created_by,
+            "created_at": NOW - timedelta(days=30),
+        })
+    return ana, bruno
+
+
+@pytest.mark.asyncio
+async def test_rebuild_materializes_scope_documents():
+    """Test member, activity, level and open-request figures per scope."""
+    db = AsyncMongoMockClient()["stats_test"]
+    await _seed(db)
+
+    await rebuild_stats(db, NOW)
+
+    vila = await get_scope_stats(db, "association:vila")
+    assert vila["members"] == 2
+    assert vila["active_users"] == 1
+    assert vila["average_level"] == 3
+    assert vila["open_requests"] == {"maintenance": 2, "noise": 1}
+    assert vila["open_requests_total"] == 3
+    assert vila["refreshed_at"] == NOW
+
+    horta = await get_scope_stats(db, "community:horta")
+    assert (horta["members"], horta["open_requests"]) == (1, {"maintenance": 1})
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_recomputes_changed_scopes():
+    """Test that the incremental refresh picks scopes by update time."""
+    db = AsyncMongoMockClient()["stats_test"]
+    ana, _ = await _seed(db)
+    await rebuild_stats(db, NOW)
+
+    later = NOW + timedelta(minutes=5)
+    await db["requests"].update_many(
+        {"created_by": ana, "status": "pending"}, {"$set": {"status": "resolved", "updated_at": later}}
+    )
+    await db["users"].insert_one({
+        "name": "Carla", "level": 1, "associations": ["centro"], "updated_at": later, "last_active": later,
+    })
+
+    assert await refresh_stats(db, NOW + timedelta(minutes=1), later) == 3
+
+    vila = await get_scope_stats(db, "association:vila")
+    assert vila["open_requests"] == {"maintenance": 1, "noise": 1}
+    horta = await get_scope_stats(db, "community:horta")
+    assert (horta["open_requests"], horta["open_requests_total"]) == ({}, 0)
+    assert (await get_scope_stats(db, "association:centro"))["members"] == 1
+
+    assert await refresh_stats(db, later + timedelta(seconds=1)) == 0
+
+
+@pytest.mark.asyncio
+async def test_rebuild_removes_scopes_without_members():
+    """Test that a scope everyone left disappears on the full rebuild."""
+    db = AsyncMongoMockClient()["stats_test"]
+    ana, _ = await _seed(db)
+    await rebuild_stats(db, NOW)
+
+    await db["users"].update_one({"_id": ana}, {"$set": {"communities": []}})
+    await rebuild_stats(db, NOW + timedelta(hours=1))
+
+    assert await get_scope_stats(db, "community:horta") is None
+
+
+@pytest.mark.asyncio
+async def test_refresher_runs_one_cycle_per_lease():
+    """Test rebuild/refresh scheduling and that a held lease skips the cycle."""
+    db = AsyncMongoMockClient()["stats_test"]
+    await _seed(db)
+    refresher = StatsRefresher(refresh_interval=60, rebuild_interval=3600)
+    other_worker = StatsRefresher(refresh_interval=60, rebuild_interval=3600)
+    refresher.db = other_worker.db = db
+
+    assert await refresher.run_once(NOW) == "rebuild"
+    assert await other_worker.run_once(NOW + timedelta(minutes=1)) == "refresh"
+    assert await refresher.run_once(NOW + timedelta(hours=2)) == "rebuild"
+
+    # Concessão ainda válida de um ciclo em andamento em outro worker
+    await db["scope_stats_jobs"].update_one(
+        {"_id": "scope_stats"}, {"$set": {"lease_until": NOW + timedelta(hours=3)}}
+    )
+    assert await other_worker.run_once(NOW + timedelta(hours=2, minutes=1)) is None
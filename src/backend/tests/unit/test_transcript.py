@@ -0,0 +1,63 @@
+"""Unit tests for the voice onboarding name extractor."""
+import pytest
+
+from services import transcript
+from services.transcript import (
+    DEFAULT_NAME,
+    IntroPattern,
+    extract_name,
+    register_intro_pattern,
+)
+
+
+@pytest.mark.parametrize("text, name", [
+    ("Meu nome é Ana Souza", "Ana Souza"),
+    ("meu nome e jose carlos", "Jose Carlos"),
+    ("MEU NOME É ÂNGELA MARIA", "Ângela Maria"),
+    ("Olá, eu sou a Maria da Silva e moro no bloco B", "Maria da Silva"),
+    ("Meu nome é Francisco das Chagas Pereira Neto", "Francisco das Chagas Pereira"),
+])
+def test_extracts_name_after_intro_phrase(text, name):
+    """Test accents, articles, particles and the name length limit."""
+    assert extract_name(text).name == name
+
+
+def test_earliest_intro_phrase_wins():
+    """Test that the first phrase in the text is used, not the first in the list."""
+    result = extract_name("Me chamo Rita, meu nome é Rita de Cássia")
+    assert result.name == "Rita"
+    assert result.pattern == "me chamo"
+
+
+def test_intro_phrases_match_whole_words():
+    """Test that 'sou' does not match inside other words."""
+    result = extract_name("Eu soube da reunião pelo Carlos")
+    assert result.pattern is None
+    assert result.confidence == transcript.FALLBACK_CONFIDENCE
+
+
+def test_skips_intro_without_a_name():
+    """Test that 'sou de São Paulo' does not become a name."""
+    result = extract_name("Sou de São Paulo e me chamo Ricardo Alves")
+    assert result.name == "Ricardo Alves"
+    assert result.confidence == 0.95
+
+
+def test_fallback_and_default_name():
+    """Test the first-words fallback and the default name."""
+    assert extract_name("Carlos Eduardo Lima").name == "Carlos Eduardo"
+    assert extract_name("a 123") == transcript.NameExtraction(DEFAULT_NAME, 0.0)
+
+
+def test_register_intro_pattern(monkeypatch):
+    """Test that new phrases are compiled into the extractor."""
+    monkeypatch.setattr(transcript, "INTRO_PATTERNS", list(transcript.INTRO_PATTERNS))
+    monkeypatch.setattr(transcript, "_compiled", None)
+    assert extract_name("Todos me conhecem como Tião").name != "Tião"
+
+    register_intro_pattern(IntroPattern("me conhecem como", 0.7))
+    result = extract_name("Todos me conhecem como Tião")
+    assert (result.name, result.confidence) == ("Tião", 0.7)
+
+    with pytest.raises(ValueError):
+        register_intro_pattern(IntroPattern("Me conhecem  como", 0.5))
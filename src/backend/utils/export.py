@@ -0,0 +1,229 @@
+"""
+Exportação em massa de coleções em NDJSON, CSV ou Parquet.
+
+Os documentos são lidos do cursor em lotes de `EXPORT_BATCH_SIZE` (o mesmo
+valor é usado como `batch_size` do cursor, para que cada lote corresponda a
+uma ida ao servidor) e cada lote é codificado em uma thread, para não
+bloquear o event loop durante exportações grandes. A memória usada depende
+do tamanho do lote, não da coleção.
+
+Parquet requer o pacote opcional `pyarrow`.
+"""
+import csv
+import importlib.util
+import io
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Type, get_args
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from utils.mongo import projection_for
+from utils.responses import dumps
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv|parquet)$"
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def export_columns(model: Type[BaseModel]) -> List[str]:
+    """Colunas exportadas: os campos do modelo, com `_id` exportado como `id`."""
+    return list(model.model_fields)
+
+
+def _row(document: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+    row = {column: document.get(column) for column in columns}
+    if "id" in row:
+        row["id"] = str(document["_id"])
+    return row
+
+
+def _cell(value: Any) -> Any:
+    """Valor escalar para CSV/Parquet; listas e objetos viram JSON."""
+    if value is None or isinstance(value, (str, int, float, bool, datetime)):
+        return value
+    if isinstance(value, ObjectId):
+        return str(value)
+    return dumps(value).decode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Arquivo em memória que entrega e descarta o que já foi escrito."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _NDJSONEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def encode(self, documents: List[Dict[str, Any]]) -> bytes:
+        return b"".join(dumps(_row(document, self.columns)) + b"\n" for document in documents)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _CSVEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self._header = True
+
+    def encode(self, documents: List[Dict[str, Any]]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if self._header:
+            writer.writerow(self.columns)
+            self._header = False
+        for document in documents:
+            row = _row(document, self.columns)
+            writer.writerow(
+                value.isoformat() if isinstance(value, datetime) else _cell(value)
+                for value in row.values()
+            )
+        return buffer.getvalue().encode()
+
+    def finish(self) -> bytes:
+        # Exportação vazia: ainda assim entrega o cabeçalho
+        return self.encode([]) if self._header else b""
+
+
+def _arrow_type(annotation: Any):
+    import pyarrow as pa
+
+    args = [arg for arg in get_args(annotation) if arg is not type(None)]
+    if args and len(args) == 1:
+        annotation = args[0]
+    if annotation is bool:
+        return pa.bool_()
+    if annotation is int:
+        return pa.int64()
+    if annotation is float:
+        return pa.float64()
+    if annotation is datetime:
+        return pa.timestamp("us")
+    return pa.string()
+
+
+class _ParquetEncoder:
+    """Um row group por lote; o esquema vem das anotações do modelo."""
+
+    def __init__(self, model: Type[BaseModel], columns: List[str]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.columns = columns
+        self._pa = pa
+        self._schema = pa.schema([
+            (column, _arrow_type(model.model_fields[column].annotation)) for column in columns
+        ])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def _coerce(self, value: Any, arrow_type) -> Any:
+        value = _cell(value)
+        if value is None or arrow_type != self._pa.string():
+            return value
+        return value if isinstance(value, str) else str(value)
+
+    def encode(self, documents: List[Dict[str, Any]]) -> bytes:
+        rows = [_row(document, self.columns) for document in documents]
+        arrays = {
+            field.name: [self._coerce(row[field.name], field.type) for row in rows]
+            for field in self._schema
+        }
+        self._writer.write_table(self._pa.Table.from_pydict(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+async def stream_export(
+    cursor,
+    model: Type[BaseModel],
+    export_format: str,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Gera o arquivo de exportação em blocos, um por lote de documentos.
+
+    `cursor` deve projetar apenas os campos de `model`; para que cada lote
+    corresponda a uma ida ao servidor, crie-o com `find(..., batch_size=...)`
+    usando o mesmo `batch_size`.
+    """
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    columns = export_columns(model)
+    encoders: Dict[str, Callable[[], Any]] = {
+        "ndjson": lambda: _NDJSONEncoder(columns),
+        "csv": lambda: _CSVEncoder(columns),
+        "parquet": lambda: _ParquetEncoder(model, columns),
+    }
+    encoder = await run_in_threadpool(encoders[export_format])
+
+    batch: List[Dict[str, Any]] = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield await run_in_threadpool(encoder.encode, batch)
+            batch = []
+    if batch:
+        yield await run_in_threadpool(encoder.encode, batch)
+    tail = await run_in_threadpool(encoder.finish)
+    if tail:
+        yield tail
+
+
+
+def export_response(
+    collection,
+    query: Dict[str, Any],
+    model: Type[BaseModel],
+    export_format: str,
+    filename: str,
+) -> StreamingResponse:
+    """Resposta em streaming com os documentos de `query`, em ordem de `_id`."""
+    if export_format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires the 'pyarrow' package"
+        )
+    cursor = collection.find(query, projection_for(model), batch_size=EXPORT_BATCH_SIZE).sort("_id", 1)
+    return StreamingResponse(
+        stream_export(cursor, model, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
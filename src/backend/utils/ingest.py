@@ -0,0 +1,98 @@
+"""
+Leitura incremental de uploads CSV e NDJSON.
+
+O corpo da requisição é consumido em blocos (`request.stream()`) e
+convertido em linhas e registros sob demanda, sem carregar o arquivo
+inteiro na memória.
+"""
+import codecs
+import csv
+from typing import Any, AsyncIterator, Dict, Tuple, Union
+
+import orjson
+
+
+class RowParseError(ValueError):
+    """Linha que não pôde ser convertida em registro."""
+
+
+# Registro lido do upload: (número da linha de dados, conteúdo ou erro)
+Row = Tuple[int, Union[Dict[str, Any], RowParseError]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], encoding: str = "utf-8-sig") -> AsyncIterator[str]:
+    """Converte blocos de bytes em linhas de texto (sem o terminador)."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Agrupa as linhas físicas em registros CSV completos.
+
+    Um campo entre aspas pode conter quebras de linha; enquanto o número de
+    aspas acumulado for ímpar, o registro continua na próxima linha.
+    """
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2 == 0:
+            yield record
+            record = ""
+    if record:
+        yield record
+
+
+async def iter_csv_rows(lines: AsyncIterator[str], delimiter: str = ",") -> AsyncIterator[Row]:
+    """
+    Gera um dicionário por registro, usando o cabeçalho como chaves.
+
+    Linhas em branco são ignoradas e células vazias são omitidas, para que
+    os campos opcionais assumam seus valores padrão.
+    """
+    header = None
+    number = 0
+    async for record in _csv_records(lines):
+        if not record.strip():
+            continue
+        values = next(csv.reader([record], delimiter=delimiter))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) > len(header):
+            yield number, RowParseError(
+                f"Expected {len(header)} columns, got {len(values)}"
+            )
+            continue
+        yield number, {
+            name: value.strip()
+            for name, value in zip(header, values)
+            if name and value.strip()
+        }
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[Row]:
+    """Gera um dicionário por linha JSON; linhas inválidas viram `RowParseError`."""
+    number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, RowParseError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield number, RowParseError("Expected a JSON object")
+            continue
+        yield number, row
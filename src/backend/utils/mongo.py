@@ -0,0 +1,67 @@
+"""
+Funções auxiliares para documentos MongoDB.
+"""
+from typing import Any, Dict, Mapping, Optional, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+
+def serialize_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Substitui o `_id` do MongoDB pelo campo `id` em formato string."""
+    document["id"] = str(document.pop("_id"))
+    return document
+
+
+async def insert_document(collection, document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Insere um documento e retorna sua representação para a resposta.
+
+    A resposta é montada a partir do documento já em memória e do
+    `inserted_id`, sem uma nova leitura no banco.
+    """
+    result = await collection.insert_one(document)
+    created = dict(document)
+    created["_id"] = result.inserted_id
+    return serialize_document(created)
+
+
+def projection_for(model: Type[BaseModel]) -> Dict[str, int]:
+    """Projeção MongoDB com os campos declarados no modelo (exceto `id`)."""
+    return {name: 1 for name in model.model_fields if name != "id"}
+
+
+def parse_fields(
+    fields: Optional[str],
+    model: Type[BaseModel],
+    views: Optional[Mapping[str, Type[BaseModel]]] = None,
+) -> Optional[Dict[str, int]]:
+    """
+    Converte o parâmetro `fields` em uma projeção.
+
+    Aceita o nome de uma visão (ex.: `summary`) ou uma lista de campos de
+    `model` separados por vírgula. Retorna `None` quando `fields` é vazio.
+    """
+    if not fields:
+        return None
+    if views and fields in views:
+        return projection_for(views[fields])
+
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    names.discard("id")
+    return {name: 1 for name in sorted(names)} or {"_id": 1}
+
+
+def project_document(document: Dict[str, Any], projection: Dict[str, int]) -> Dict[str, Any]:
+    """Aplica em memória uma projeção a um documento já serializado."""
+    projected = {"id": document["id"]}
+    for name in projection:
+        if name in document:
+            projected[name] = document[name]
+    return projected
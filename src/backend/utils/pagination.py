@@ -0,0 +1,79 @@
+"""
+Paginação por cursor (keyset) e streaming NDJSON para coleções MongoDB.
+
+A paginação usa o `_id` como chave: cada página traz no máximo `limit`
+documentos com `_id` maior que o cursor recebido. Diferente de `skip`, o custo
+de cada página não cresce com a posição na coleção.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+from utils.mongo import serialize_document
+from utils.responses import dumps
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def parse_cursor(after: Optional[str]) -> Optional[ObjectId]:
+    """Converte o cursor recebido na query string em ObjectId."""
+    if after is None:
+        return None
+    try:
+        return ObjectId(after)
+    except (InvalidId, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {after}"
+        )
+
+
+def keyset_filter(
+    query: Dict[str, Any],
+    after: Optional[ObjectId],
+    descending: bool = False,
+) -> Dict[str, Any]:
+    """Restringe a consulta aos documentos posteriores ao cursor."""
+    if after is None:
+        return query
+    return {**query, "_id": {"$lt" if descending else "$gt": after}}
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    after: Optional[ObjectId] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+) -> Dict[str, Any]:
+    """
+    Busca uma página de documentos ordenados por `_id`.
+
+    Lê `limit + 1` documentos para saber se existe uma próxima página sem
+    precisar de uma contagem separada. Com `descending`, os mais recentes
+    vêm primeiro.
+    """
+    cursor = collection.find(
+        keyset_filter(query, after, descending), projection
+    ).sort("_id", -1 if descending else 1)
+    documents: List[Dict[str, Any]] = await cursor.to_list(limit + 1)
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = str(documents[-1]["_id"])
+
+    return {
+        "items": [serialize_document(document) for document in documents],
+        "next_cursor": next_cursor,
+    }
+
+
+async def stream_ndjson(cursor) -> AsyncIterator[bytes]:
+    """Gera uma linha NDJSON por documento à medida que o cursor os lê."""
+    async for document in cursor:
+        yield dumps(serialize_document(document)) + b"\n"
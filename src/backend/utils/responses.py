@@ -0,0 +1,68 @@
+"""
+Serialização JSON rápida para documentos MongoDB.
+
+Usa orjson, que codifica `datetime`, `UUID`, enums e estruturas aninhadas em
+código nativo. Tipos BSON (ObjectId, Decimal128) e modelos Pydantic são
+convertidos em `_default`, chamado apenas para os valores que o orjson não
+conhece.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple, Type
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa o conteúdo em JSON (bytes)."""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class MongoJSONResponse(JSONResponse):
+    """
+    Resposta JSON padrão da API.
+
+    Rotas que retornam esta resposta diretamente também evitam a passagem
+    pelo `jsonable_encoder` do FastAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _model_fields(model: Type[BaseModel]) -> List[Tuple[str, Any]]:
+    """(nome, campo) de cada campo declarado no modelo."""
+    return list(model.model_fields.items())
+
+
+def trusted_response(model: Type[BaseModel], document: Dict[str, Any]) -> MongoJSONResponse:
+    """
+    Monta a resposta de um documento lido do nosso próprio banco sem validá-lo.
+
+    O documento é projetado nos campos declarados em `model` (campos
+    desconhecidos são descartados e os ausentes recebem o valor padrão),
+    mantendo o formato anunciado pelo `response_model` da rota. Valores
+    aninhados são retornados como estão armazenados.
+    """
+    content = {}
+    for name, field in _model_fields(model):
+        if name in document:
+            content[name] = document[name]
+        elif not field.is_required():
+            content[name] = field.get_default(call_default_factory=True)
+    return MongoJSONResponse(content)